@@ -1,9 +1,8 @@
 import sys
-import random
-import csv
+import multiprocessing
 import os
-import hashlib
-import re
+import threading
+import time
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication,
@@ -22,107 +21,85 @@ from PyQt6.QtWidgets import (
     QButtonGroup,
     QScrollArea,
     QGroupBox,
+    QProgressBar,
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from styles import StyleSheet
+from member_engine import GenerationCancelled, export_member_list, tag_edge_path
+
+SAVE_FILTERS = {
+    'CSV files (*.csv)': '.csv',
+    'Parquet files (*.parquet)': '.parquet',
+    'Arrow IPC files (*.arrow)': '.arrow',
+    'SQLite databases (*.db)': '.db',
+    'Excel workbooks (*.xlsx)': '.xlsx',
+}
+
+
+class GenerationWorker(QThread):
+    progress = pyqtSignal(int, float, float)
+    succeeded = pyqtSignal(str, object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, config, file_path, workers, seed, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.file_path = file_path
+        self.workers = workers
+        self.seed = seed
+        self.cancel_event = threading.Event()
+        self.started_at = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, rows_done):
+        elapsed = time.monotonic() - self.started_at
+        rows_per_second = rows_done / elapsed if elapsed > 0 else 0.0
+        remaining = self.config["amount"] - rows_done
+        eta_seconds = remaining / rows_per_second if rows_per_second > 0 else 0.0
+        self.progress.emit(rows_done, rows_per_second, eta_seconds)
+
+    def run(self):
+        self.started_at = time.monotonic()
+        try:
+            _, seed = export_member_list(
+                self.config,
+                self.file_path,
+                self.workers,
+                self.seed,
+                cancel_event=self.cancel_event,
+                on_progress=self.report_progress,
+            )
+        except GenerationCancelled:
+            self.remove_partial_file()
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.remove_partial_file()
+            self.failed.emit(str(e))
+            return
 
+        self.report_progress(self.config["amount"])
+        self.succeeded.emit(self.file_path, seed)
 
-def generate_member_id(include_letters, letter_count, id_length):
-    if include_letters:
-        letters = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=letter_count))
-        numbers = ''.join(random.choices('0123456789', k=id_length - letter_count))
-        return letters + numbers
-    else:
-        return ''.join(random.choices('0123456789', k=id_length))
-
-
-def generate_psid_id(include_letters, letter_count, id_length):
-    if include_letters:
-        numbers = ''.join(random.choices('0123456789', k=id_length - letter_count))
-        return numbers
-
-
-def generate_line_uid():
-    uid = 'U' + ''.join(random.choices('0123456789abcdef', k=32))
-    return uid if re.match(r"^U[0-9a-f]{32}$", uid) else None
-
-
-def generate_phone_number(country, include_country_code, include_plus, format_pattern):
-    if country == "Taiwan":
-        phone_number = f"{random.randint(10000000, 99999999)}"
-        if include_country_code:
-            full_number = f"8869{phone_number}"
-        else:
-            full_number = f"09{phone_number}"
-    elif country == "Hong Kong":
-        phone_number = f"{random.randint(10000000, 99999999)}"
-        if include_country_code:
-            full_number = f"852{phone_number}"
-        else:
-            full_number = f"9{phone_number}"
-
-    if include_country_code and include_plus:
-        full_number = f"+{full_number}"
-
-    if format_pattern:
-        if country == "Taiwan":
-            return f"{full_number[:4]} {full_number[4:]}"
-        elif country == "Hong Kong":
-            return f"{full_number[:4]} {full_number[4:8]}"
-
-    return full_number
-
-
-def hash_phone_number(phone_number):
-    return hashlib.sha256(phone_number.encode('utf-8')).hexdigest()
-
-
-def generate_email(length, format_check, hash_email):
-    local_part = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=length))
-    domain = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=5)) + ".com"
-    email = f"{local_part}@{domain}"
-
-    if format_check:
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            raise ValueError("Generated email is not in valid format")
-
-    if hash_email:
-        email = hashlib.sha256(email.encode('utf-8')).hexdigest()
-
-    return email
-
-
-def generate_tags(tags, tag_option, amount, random_tag_count=False, min_tags=1, max_tags=3):
-    all_tags = []
-    for i in range(amount):
-        if tag_option == "all_in_one":
-            all_tags.append(tags)
-        elif tag_option == "separate_columns":
-            all_tags.append(tags)
-        elif tag_option == "random":
-            if random_tag_count:
-                num_tags = random.randint(min_tags, min(max_tags, len(tags)))
-                all_tags.append(random.sample(tags, k=num_tags))
-            else:
-                all_tags.append(random.sample(tags, k=1))
-    return all_tags
-
-
-def export_to_csv(data_list, include_title, columns, file_path):
-    with open(file_path, mode='w', newline='', encoding='utf-8-sig') as file:
-        writer = csv.writer(file)
-
-        if include_title:
-            writer.writerow(columns)
-
-        for row in data_list:
-            writer.writerow(row)
+    def remove_partial_file(self):
+        # A SQLite export cleans up its own tables; the database may hold others.
+        if self.file_path.lower().endswith('.db'):
+            return
+        for path in (self.file_path, tag_edge_path(self.file_path)):
+            if os.path.exists(path):
+                os.remove(path)
 
 
 class MemberListGenerator(QWidget):
     def __init__(self):
         super().__init__()
+        self.worker = None
+        self.total_rows = 0
+        self.save_dir = os.path.expanduser('~/Downloads')
         self.initUI()
 
     def initUI(self):
@@ -141,6 +118,7 @@ class MemberListGenerator(QWidget):
         self.include_country_code_checkbox.setVisible(False)
         self.include_email_checkbox = QCheckBox('包含 Email', self)
         self.include_psid_checkbox = QCheckBox('包含 PSID', self)
+        self.unique_ids_checkbox = QCheckBox('LINE User ID、會員編號、Email 不重複', self)
 
         self.country_label = QLabel('選擇國家:')
         self.country_combo = QComboBox(self)
@@ -153,11 +131,18 @@ class MemberListGenerator(QWidget):
         self.all_tags_in_one_radio = QRadioButton("所有標籤放置於 Tags 欄位")
         self.separate_tags_radio = QRadioButton("各個標籤放置不同欄位 (E.g. Tag1, Tag2...)")
         self.random_tags_radio = QRadioButton("隨機(需搭配下面選項使用)")
+        self.quota_tags_radio = QRadioButton("依指定數量或百分比分配")
         self.tag_option_group.addButton(self.all_tags_in_one_radio)
         self.tag_option_group.addButton(self.separate_tags_radio)
         self.tag_option_group.addButton(self.random_tags_radio)
+        self.tag_option_group.addButton(self.quota_tags_radio)
         self.all_tags_in_one_radio.setChecked(True)
 
+        self.quota_label = QLabel('各標籤數量或百分比（用逗號分隔，例如 100,200 或 30%,70%）:')
+        self.quota_input = QLineEdit(self)
+
+        self.long_tag_layout_checkbox = QCheckBox('標籤另存為會員編號-標籤對應檔 (_tags.csv)', self)
+
         self.random_tag_count_checkbox = QCheckBox('隨機生成標籤數量', self)
         self.min_tags_label = QLabel('最小標籤數量:')
         self.min_tags_spinbox = QSpinBox(self)
@@ -166,8 +151,22 @@ class MemberListGenerator(QWidget):
         self.max_tags_spinbox = QSpinBox(self)
         self.max_tags_spinbox.setMinimum(1)
 
+        self.workers_label = QLabel('平行處理數量:')
+        self.workers_spinbox = QSpinBox(self)
+        self.workers_spinbox.setRange(1, os.cpu_count() or 1)
+        self.seed_label = QLabel('隨機種子（留空則隨機產生）:')
+        self.seed_input = QLineEdit(self)
+
         self.generate_button = QPushButton('Generate Member List', self)
         self.generate_button.clicked.connect(self.generate_member_list)
+        self.cancel_button = QPushButton('取消', self)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_generation)
+
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        self.progress_label = QLabel('', self)
 
         layout = QVBoxLayout()
         layout.addWidget(self.amount_label)
@@ -178,6 +177,7 @@ class MemberListGenerator(QWidget):
         layout.addWidget(self.include_country_code_checkbox)
         layout.addWidget(self.include_email_checkbox)
         layout.addWidget(self.include_psid_checkbox)
+        layout.addWidget(self.unique_ids_checkbox)
         layout.addWidget(self.country_label)
         layout.addWidget(self.country_combo)
         layout.addWidget(self.tags_label)
@@ -185,12 +185,23 @@ class MemberListGenerator(QWidget):
         layout.addWidget(self.all_tags_in_one_radio)
         layout.addWidget(self.separate_tags_radio)
         layout.addWidget(self.random_tags_radio)
+        layout.addWidget(self.quota_tags_radio)
+        layout.addWidget(self.quota_label)
+        layout.addWidget(self.quota_input)
+        layout.addWidget(self.long_tag_layout_checkbox)
         layout.addWidget(self.random_tag_count_checkbox)
         layout.addWidget(self.min_tags_label)
         layout.addWidget(self.min_tags_spinbox)
         layout.addWidget(self.max_tags_label)
         layout.addWidget(self.max_tags_spinbox)
+        layout.addWidget(self.workers_label)
+        layout.addWidget(self.workers_spinbox)
+        layout.addWidget(self.seed_label)
+        layout.addWidget(self.seed_input)
         layout.addWidget(self.generate_button)
+        layout.addWidget(self.cancel_button)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.progress_label)
 
         self.setLayout(layout)
 
@@ -200,84 +211,68 @@ class MemberListGenerator(QWidget):
     def generate_member_list(self):
         try:
             amount = int(self.amount_input.text())
+            if amount <= 0:
+                raise ValueError('amount must be positive')
             include_uid = self.include_uid_checkbox.isChecked()
             include_member_id = self.include_member_id_checkbox.isChecked()
             include_phone = self.include_phone_checkbox.isChecked()
             include_country_code = self.include_country_code_checkbox.isChecked()
             include_email = self.include_email_checkbox.isChecked()
             include_psid = self.include_psid_checkbox.isChecked()
+            unique_ids = self.unique_ids_checkbox.isChecked()
             country = self.country_combo.currentText()
 
             tags = [tag.strip() for tag in self.tags_input.text().split(',') if tag.strip()]
             random_tag_count = self.random_tag_count_checkbox.isChecked()
             min_tags = self.min_tags_spinbox.value()
             max_tags = self.max_tags_spinbox.value()
+            workers = self.workers_spinbox.value()
+            seed_text = self.seed_input.text().strip()
+            seed = int(seed_text) if seed_text else None
 
             tag_option = "all_in_one"
             if self.separate_tags_radio.isChecked():
                 tag_option = "separate_columns"
             elif self.random_tags_radio.isChecked():
                 tag_option = "random"
-
-            tags_list = generate_tags(
-                tags, tag_option, amount, random_tag_count, min_tags, max_tags
-            )
-
-            data_list = []
-            columns = []
-            if include_uid:
-                columns.append('LINE User ID')
-            if include_member_id:
-                columns.append('Member ID')
-            if include_phone:
-                columns.append('Phone')
-            if include_email:
-                columns.append('Email')
-            if include_psid:
-                columns.append('PSID')
-            if tag_option == "separate_columns":
-                columns.extend([f'Tag{i+1}' for i in range(len(tags))])
-            else:
-                columns.append('Tags')
-
-            for i in range(amount):
-                member_data = []
-
-                if include_uid:
-                    line_uid = generate_line_uid()
-                    member_data.append(line_uid)
-
-                if include_member_id:
-                    member_id = generate_member_id(True, 2, 8)
-                    member_data.append(member_id)
-
-                if include_phone:
-                    phone = generate_phone_number(
-                        country, self.include_country_code_checkbox.isChecked(), True, False
-                    )
-                    member_data.append(phone)
-
-                if include_email:
-                    email = generate_email(10, True, False)
-                    member_data.append(email)
-
-                if include_psid:
-                    psid = generate_psid_id(True, 0, 16)
-                    member_data.append(psid)
-
-                if tag_option == "separate_columns":
-                    member_data.extend(tags_list[i] + [''] * (len(tags) - len(tags_list[i])))
+            elif self.quota_tags_radio.isChecked():
+                tag_option = "quota"
+
+            config = {
+                "amount": amount,
+                "line_uid_title": 'LINE User ID' if include_uid else '',
+                "include_member_id": include_member_id,
+                "include_letters": True,
+                "letter_count": 2,
+                "id_length": 8,
+                "include_phone_number": include_phone,
+                "country": country,
+                "include_country_code": include_country_code,
+                "include_plus": True,
+                "email_title": 'Email' if include_email else '',
+                "email_length": 10,
+                "email_format_check": True,
+                "psid_title": 'PSID' if include_psid else '',
+                "psid_length": 16,
+                "unique_ids": unique_ids,
+                "tags": tags,
+                "tag_option": tag_option,
+                "tag_layout": "long" if self.long_tag_layout_checkbox.isChecked() else "wide",
+                "random_tag_count": random_tag_count,
+                "min_tags": min_tags,
+                "max_tags": max_tags,
+            }
+
+            if tag_option == "quota":
+                quotas = [quota.strip() for quota in self.quota_input.text().split(',') if quota.strip()]
+                if quotas and all(quota.endswith('%') for quota in quotas):
+                    config["tag_percentages"] = [float(quota[:-1]) for quota in quotas]
                 else:
-                    member_data.append(', '.join(tags_list[i]))
-
-                data_list.append(member_data)
+                    config["tag_quotas"] = [int(quota) for quota in quotas]
 
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, 'Save CSV', os.path.expanduser('~/Downloads'), 'CSV files (*.csv)'
-            )
+            file_path = self.choose_save_path()
             if file_path:
-                export_to_csv(data_list, True, columns, file_path)
-                QMessageBox.information(self, 'Success', f'檔案已匯出到: {file_path}')
+                self.start_worker(config, file_path, workers, seed)
             else:
                 QMessageBox.warning(self, 'Warning', '未選擇保存路徑')
 
@@ -286,8 +281,82 @@ class MemberListGenerator(QWidget):
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'發生錯誤: {e}')
 
+    def choose_save_path(self):
+        file_name = f"member_list_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            'Save CSV',
+            os.path.join(self.save_dir, file_name),
+            ';;'.join(SAVE_FILTERS),
+        )
+        if not file_path:
+            return None
+
+        if os.path.splitext(file_path)[1].lower() not in SAVE_FILTERS.values():
+            file_path += SAVE_FILTERS.get(selected_filter, '.csv')
+        self.save_dir = os.path.dirname(file_path)
+        return file_path
+
+    def start_worker(self, config, file_path, workers, seed):
+        self.worker = GenerationWorker(config, file_path, workers, seed, self)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.succeeded.connect(self.on_generation_succeeded)
+        self.worker.failed.connect(self.on_generation_failed)
+        self.worker.cancelled.connect(self.on_generation_cancelled)
+        self.worker.finished.connect(self.on_worker_finished)
+
+        self.total_rows = config["amount"]
+        self.progress_bar.setValue(0)
+        self.progress_label.setText('')
+        self.generate_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.worker.start()
+
+    def cancel_generation(self):
+        if self.worker is not None:
+            self.cancel_button.setEnabled(False)
+            self.progress_label.setText('正在取消...')
+            self.worker.cancel()
+
+    def update_progress(self, rows_done, rows_per_second, eta_seconds):
+        if self.total_rows:
+            self.progress_bar.setValue(int(rows_done * 1000 / self.total_rows))
+        self.progress_label.setText(
+            f'已完成 {rows_done:,} / {self.total_rows:,} 筆，'
+            f'{rows_per_second:,.0f} 筆/秒，預計剩餘 {eta_seconds:,.0f} 秒'
+        )
+
+    def on_generation_succeeded(self, file_path, seed):
+        self.progress_bar.setValue(1000)
+        message = f'檔案已匯出到: {file_path}'
+        if self.worker is not None and self.worker.config["tag_layout"] == "long":
+            message += f'\n標籤對應檔: {tag_edge_path(file_path)}'
+        if seed is not None:
+            message += f'\n隨機種子: {seed}'
+        QMessageBox.information(self, 'Success', message)
+
+    def on_generation_failed(self, error):
+        QMessageBox.critical(self, 'Error', f'發生錯誤: {error}')
+
+    def on_generation_cancelled(self):
+        self.progress_bar.setValue(0)
+        self.progress_label.setText('已取消，未完成的檔案已刪除')
+
+    def on_worker_finished(self):
+        self.generate_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.worker.deleteLater()
+        self.worker = None
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     generator = MemberListGenerator()
     generator.show()
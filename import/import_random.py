@@ -1,108 +1,8 @@
-import random
-import csv
-import os
-import hashlib
-from datetime import datetime
-import re
+import argparse
+import sys
+import time
 
-
-def generate_member_id(include_letters, letter_count, id_length):
-    if include_letters:
-        letters = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=letter_count))
-        numbers = ''.join(random.choices('0123456789', k=id_length - letter_count))
-        return letters + numbers
-    else:
-        return ''.join(random.choices('0123456789', k=id_length))
-
-
-def generate_line_uid():
-    uid = 'U' + ''.join(random.choices('0123456789abcdef', k=32))
-    return uid if re.match(r"^U[0-9a-f]{32}$", uid) else None
-
-
-def generate_phone_number(country_code, include_plus, format_pattern):
-    phone_number = f"{random.randint(100000000, 999999999)}"
-
-    if country_code:
-        if include_plus:
-            return (
-                f"+{country_code}{phone_number}"
-                if not format_pattern
-                else f"+{country_code} {phone_number[:4]} {phone_number[4:]}"
-            )
-        return (
-            f"{country_code}{phone_number}"
-            if not format_pattern
-            else f"{country_code} {phone_number[:4]} {phone_number[4:]}"
-        )
-    return phone_number if not format_pattern else f"{phone_number[:4]} {phone_number[4:]}"
-
-
-def hash_phone_number(phone_number):
-    return hashlib.sha256(phone_number.encode('utf-8')).hexdigest()
-
-
-def generate_email(length, format_check, hash_email):
-    local_part = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=length))
-    domain = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=5)) + ".com"
-    email = f"{local_part}@{domain}"
-
-    if format_check:
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            raise ValueError("Generated email is not in valid format")
-
-    if hash_email:
-        email = hashlib.sha256(email.encode('utf-8')).hexdigest()
-
-    return email
-
-
-def generate_tags(tags, distribute_evenly, amount, random_tag_count=False, min_tags=1, max_tags=3):
-    all_tags = []
-    for i in range(amount):
-        if random_tag_count:
-            num_tags = random.randint(min_tags, max_tags)
-            all_tags.append(random.sample(tags, k=num_tags))
-        else:
-            if distribute_evenly:
-                all_tags.append([tags[i % len(tags)]])
-            else:
-                all_tags.append([random.choice(tags)])
-    return all_tags
-
-
-def export_to_csv(
-    data_list,
-    include_title,
-    line_uid_title,
-    member_id_title,
-    phone_number_title,
-    tag_title,
-    email_title,
-):
-    file_name = f"member_list_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    file_path = os.path.expanduser(f"~/Downloads/{file_name}")
-
-    with open(file_path, mode='w', newline='') as file:
-        writer = csv.writer(file)
-
-        if include_title:
-            header = []
-            if line_uid_title:
-                header.append(line_uid_title)
-            if member_id_title:
-                header.append(member_id_title)
-            if phone_number_title:
-                header.append(phone_number_title)
-            if email_title:
-                header.append(email_title)
-            header.append(tag_title)
-            writer.writerow(header)
-
-        for row in data_list:
-            writer.writerow(row)
-
-    print(f"檔案已成功匯出到: {file_path}")
+from member_engine import export_member_list, member_output_path, resume_member_list
 
 
 def generate_member_list(
@@ -130,47 +30,104 @@ def generate_member_list(
     random_tag_count,
     min_tags,
     max_tags,
+    workers=1,
+    seed=None,
+    unique_ids=False,
+    split_rows=None,
+    split_bytes=None,
+    compression=None,
+    output_format=None,
+    checkpoint_rows=None,
+    hash_workers=None,
 ):
-    data_list = []
-
-    for i in range(amount):
-        member_data = []
-
-        if line_uid_title:
-            line_uid = generate_line_uid()
-            member_data.append(line_uid)
-
-        if include_member_id:
-            member_id = generate_member_id(include_letters, letter_count, id_length)
-            member_data.append(member_id)
-
-        if include_phone_number:
-            phone = generate_phone_number(country_code, include_plus, format_pattern)
-            if hash_numbers:
-                phone = hash_phone_number(phone)
-            member_data.append(phone)
+    config = {
+        "amount": amount,
+        "include_title": include_title,
+        "line_uid_title": line_uid_title,
+        "member_id_title": member_id_title,
+        "phone_number_title": phone_number_title,
+        "tag_title": tag_title,
+        "include_member_id": include_member_id,
+        "include_phone_number": include_phone_number,
+        "country_code": country_code,
+        "include_plus": include_plus,
+        "format_pattern": format_pattern,
+        "hash_numbers": hash_numbers,
+        "email_title": email_title,
+        "include_letters": include_letters,
+        "letter_count": letter_count,
+        "id_length": id_length,
+        "email_length": email_length,
+        "email_format_check": email_format_check,
+        "email_hash": email_hash,
+        "tags": tags,
+        "distribute_evenly": distribute_evenly,
+        "random_tag_count": random_tag_count,
+        "min_tags": min_tags,
+        "max_tags": max_tags,
+        "unique_ids": unique_ids,
+        "split_rows": split_rows,
+        "split_bytes": split_bytes,
+        "compression": compression,
+        "output_format": output_format,
+        "checkpoint_rows": checkpoint_rows,
+        "hash_workers": hash_workers,
+    }
+
+    file_path = None
+    if checkpoint_rows is not None:
+        # Shown up front: after a crash this is the path to pass to --resume.
+        file_path = member_output_path(config)
+        print(f"輸出檔案: {file_path}（中斷時可用 --resume {file_path} 繼續）")
+
+    started_at = time.perf_counter()
+    file_path, seed = export_member_list(config, file_path, workers=workers, seed=seed)
+    seconds = time.perf_counter() - started_at
+    print(f"檔案已成功匯出到: {file_path}")
+    print(f"耗時 {seconds:.2f} 秒，{amount / seconds if seconds > 0 else 0:,.0f} 筆/秒")
+    if seed is not None:
+        print(f"隨機種子: {seed}")
 
-        if email_title:
-            email = generate_email(email_length, email_format_check, email_hash)
-            member_data.append(email)
 
-        tag_list = generate_tags(tags, distribute_evenly, 1, random_tag_count, min_tags, max_tags)
-        member_data.append(", ".join(tag_list[0]))
+def resume_member_list_export(file_path):
+    started_at = time.perf_counter()
+    file_path, seed = resume_member_list(file_path)
+    print(f"已從斷點繼續並完成匯出: {file_path}")
+    print(f"耗時 {time.perf_counter() - started_at:.2f} 秒，隨機種子: {seed}")
 
-        data_list.append(member_data)
 
-    export_to_csv(
-        data_list,
-        include_title,
-        line_uid_title,
-        member_id_title,
-        phone_number_title,
-        email_title,
-        tag_title,
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="平行處理的行程數量")
+    parser.add_argument("--seed", type=int, default=None, help="隨機種子，用於重現相同結果")
+    parser.add_argument("--split-rows", type=int, default=None, help="每個檔案最多筆數")
+    parser.add_argument("--split-bytes", type=int, default=None, help="每個檔案最大位元組數")
+    parser.add_argument(
+        "--compression", choices=["gzip", "zstd"], default=None, help="壓縮輸出檔案 (.gz / .zst)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet", "arrow", "sqlite", "xlsx"],
+        default=None,
+        help="輸出檔案格式",
     )
+    parser.add_argument(
+        "--checkpoint-rows", type=int, default=None, help="每產生多少筆記錄一次斷點，可用 --resume 繼續"
+    )
+    parser.add_argument(
+        "--hash-workers", type=int, default=None, help="雜湊電話號碼或 Email 的行程數量，預設為 CPU 核心數"
+    )
+    parser.add_argument("--resume", default=None, help="從斷點繼續先前中斷的輸出檔案")
+    args = parser.parse_args()
 
+    if args.resume:
+        try:
+            resume_member_list_export(args.resume)
+        except Exception as e:
+            print(f"發生錯誤: {e}")
+            sys.exit(1)
+        sys.exit(0)
 
-if __name__ == "__main__":
     try:
 
         include_title = input("是否包含標題欄位 (y/n): ").strip().lower() == 'y'
@@ -250,6 +207,10 @@ if __name__ == "__main__":
             min_tags = int(input("請輸入每人最少標籤數量: "))
             max_tags = int(input("請輸入每人最多標籤數量: "))
 
+        unique_ids = (
+            input("是否保證 LINE UID、會員編號與 Email 不重複 (y/n): ").strip().lower() == 'y'
+        )
+
         amount = int(input("請輸入要生成的成員數量: "))
 
         generate_member_list(
@@ -277,6 +238,15 @@ if __name__ == "__main__":
             random_tag_count=random_tag_count,
             min_tags=min_tags,
             max_tags=max_tags,
+            workers=args.workers,
+            seed=args.seed,
+            unique_ids=unique_ids,
+            split_rows=args.split_rows,
+            split_bytes=args.split_bytes,
+            compression=args.compression,
+            output_format=args.format,
+            checkpoint_rows=args.checkpoint_rows,
+            hash_workers=args.hash_workers,
         )
 
     except ValueError:
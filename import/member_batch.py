@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+from member_engine import (
+    DEFAULT_CONFIG,
+    default_export_path,
+    export_member_list,
+    member_output_path,
+    resume_member_list,
+)
+from member_engine.checkpoint import checkpoint_path
+
+CHECKPOINT_SUFFIX = checkpoint_path("")
+
+JOB_KEYS = {"name", "file_path", "workers", "seed"}
+
+
+def load_jobs(path):
+    if path.lower().endswith('.toml'):
+        if tomllib is None:
+            raise ValueError("讀取 TOML 設定需要 Python 3.11 以上版本")
+        with open(path, mode='rb') as file:
+            document = tomllib.load(file)
+    else:
+        with open(path, encoding='utf-8') as file:
+            document = json.load(file)
+
+    # A file is one job, a list of jobs, or shared defaults plus a "jobs" list.
+    if isinstance(document, list):
+        defaults, jobs = {}, document
+    elif "jobs" in document:
+        defaults = {key: value for key, value in document.items() if key != "jobs"}
+        jobs = document["jobs"]
+    else:
+        defaults, jobs = {}, [document]
+
+    jobs = [{**defaults, **job} for job in jobs]
+    for index, job in enumerate(jobs, 1):
+        unknown = sorted(set(job) - set(DEFAULT_CONFIG) - JOB_KEYS)
+        if unknown:
+            raise ValueError(f"第 {index} 個工作含有未知的設定: {', '.join(unknown)}")
+    return jobs
+
+
+def job_directory(output_dir):
+    return output_dir or os.path.dirname(default_export_path())
+
+
+def job_file_path(job, index, output_dir, stamp):
+    if job.get("file_path"):
+        return job["file_path"]
+    name = job.get('name') or f'job{index}'
+    return os.path.join(job_directory(output_dir), f"member_list_{stamp}_{name}.csv")
+
+
+def find_checkpointed_path(job, index, output_dir):
+    # Without a file_path every run gets a new time stamp, so --resume picks
+    # up the newest checkpoint an earlier run of this job left behind.
+    directory = job_directory(output_dir)
+    name = job.get('name') or f'job{index}'
+    pattern = re.compile(
+        rf"member_list_\d{{8}}_\d{{6}}_{re.escape(name)}\.csv.*{re.escape(CHECKPOINT_SUFFIX)}"
+    )
+    if not os.path.isdir(directory):
+        return None
+    matches = sorted(entry for entry in os.listdir(directory) if pattern.fullmatch(entry))
+    if not matches:
+        return None
+    return os.path.join(directory, matches[-1][: -len(CHECKPOINT_SUFFIX)])
+
+
+def run_job(job, file_path, resume=False):
+    # Returns the seconds taken, the path export_member_list actually wrote
+    # (with format and compression extensions) and the seed.
+    config = {key: value for key, value in job.items() if key not in JOB_KEYS}
+    started_at = time.perf_counter()
+    if resume:
+        output_path = member_output_path(config, file_path)
+        if os.path.exists(checkpoint_path(output_path)):
+            file_path, seed = resume_member_list(output_path)
+            return time.perf_counter() - started_at, file_path, seed
+    file_path, seed = export_member_list(config, file_path, job.get("workers", 1), job.get("seed"))
+    return time.perf_counter() - started_at, file_path, seed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m member_batch')
+    parser.add_argument("config", nargs='+', help="JSON 或 TOML 設定檔")
+    parser.add_argument("--output-dir", default=None, help="未指定 file_path 的工作輸出目錄")
+    parser.add_argument("--keep-going", action='store_true', help="工作失敗時繼續執行後續工作")
+    parser.add_argument(
+        "--resume", action='store_true', help="有斷點檔案的工作從斷點繼續，而非重新產生"
+    )
+    args = parser.parse_args(argv)
+
+    jobs = []
+    for path in args.config:
+        try:
+            jobs.extend(load_jobs(path))
+        except (OSError, ValueError) as e:
+            print(f"無法讀取設定檔 {path}: {e}")
+            return 2
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    failures = 0
+    total_seconds = 0.0
+    for index, job in enumerate(jobs, 1):
+        name = job.get("name") or f"job{index}"
+        file_path = None
+        if args.resume and not job.get("file_path"):
+            file_path = find_checkpointed_path(job, index, args.output_dir)
+        file_path = file_path or job_file_path(job, index, args.output_dir, stamp)
+        try:
+            seconds, file_path, seed = run_job(job, file_path, args.resume)
+        except Exception as e:
+            failures += 1
+            print(f"[{index}/{len(jobs)}] {name} 失敗: {e}")
+            if not args.keep_going:
+                break
+            continue
+
+        total_seconds += seconds
+        amount = job.get("amount", 0)
+        rows_per_second = amount / seconds if seconds > 0 else 0.0
+        seed_text = f"，隨機種子 {seed}" if seed is not None else ""
+        print(
+            f"[{index}/{len(jobs)}] {name}: {amount:,} 筆，{seconds:.2f} 秒，"
+            f"{rows_per_second:,.0f} 筆/秒 -> {file_path}{seed_text}"
+        )
+
+    print(f"共 {len(jobs)} 個工作，失敗 {failures} 個，總耗時 {total_seconds:.2f} 秒")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+import member_engine
+from member_engine.tags import BATCH_SIZE, tag_column_producer
+
+TAGS = [f"tag{i}" for i in range(20)]
+MANY_TAGS = [f"tag{i}" for i in range(5000)]
+
+BASE_CONFIG = {
+    "line_uid_title": "LINE User ID",
+    "include_member_id": True,
+    "include_letters": True,
+    "letter_count": 2,
+    "id_length": 8,
+    "include_phone_number": True,
+    "country": "Taiwan",
+    "include_plus": True,
+    "email_title": "Email",
+    "psid_title": "PSID",
+    "tags": TAGS,
+    "tag_option": "all_in_one",
+    "min_tags": 1,
+    "max_tags": 3,
+}
+
+
+def per_row(function, *args):
+    def run(n):
+        for _ in range(n):
+            function(*args)
+
+    return run
+
+
+def batch_case(function, *args, **kwargs):
+    # Discards the generated values; only a float return counts as a timing.
+    def run(n):
+        function(n, *args, **kwargs)
+
+    return run
+
+
+def tags_case(tag_option, random_tag_count=False, tags=TAGS, zipf_exponent=None):
+    def run(n):
+        for _ in member_engine.iter_tags(
+            tags, tag_option, n, random_tag_count, 1, 3, zipf_exponent=zipf_exponent
+        ):
+            pass
+
+    return run
+
+
+def quota_case(random_tag_count=False):
+    # Single tags: the quotas cover every member. Multiple tags: each tag goes
+    # to a quarter of the members, about five tags per member.
+    def run(n):
+        share = n // 4 if random_tag_count else n // len(TAGS)
+        config = member_engine.normalize_config(
+            dict(
+                tags=TAGS,
+                tag_option="quota",
+                tag_quotas=[share] * len(TAGS),
+                random_tag_count=random_tag_count,
+                amount=n,
+            )
+        )
+        produce = tag_column_producer(config, seed=0)
+        for start in range(0, n, BATCH_SIZE):
+            produce(min(BATCH_SIZE, n - start), start, None)
+
+    return run
+
+
+def hash_case(workers):
+    def run(n):
+        values = member_engine.generate_phone_number_batch(n, "886", True, False)
+        with member_engine.ParallelHasher(workers) as hasher:
+            started_at = time.perf_counter()
+            hasher.hash(values)
+            return time.perf_counter() - started_at
+
+    return run
+
+
+def export_case(background_write, file_name='bench.csv'):
+    def run(n):
+        config = dict(BASE_CONFIG, amount=n, background_write=background_write)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, file_name)
+            member_engine.export_member_list(config, file_path)
+
+    return run
+
+
+GENERATOR_CASES = {
+    "line_uid": per_row(member_engine.generate_line_uid),
+    "member_id": per_row(member_engine.generate_member_id, True, 2, 8),
+    "phone_number": per_row(member_engine.generate_phone_number, "886", True, False),
+    "country_phone_number": per_row(
+        member_engine.generate_country_phone_number, "Taiwan", True, True, False
+    ),
+    "email": per_row(member_engine.generate_email, 10, True, False),
+    "email_hashed": per_row(member_engine.generate_email, 10, True, True),
+    "psid": per_row(member_engine.generate_psid_id, 16),
+    "line_uid_batch": batch_case(member_engine.generate_line_uid_batch),
+    "line_uid_secure_batch": batch_case(member_engine.generate_line_uid_batch, secure=True),
+    "member_id_batch": batch_case(member_engine.generate_member_id_batch, True, 2, 8),
+    "phone_number_batch": batch_case(
+        member_engine.generate_phone_number_batch, "886", True, False
+    ),
+    "country_phone_number_batch": batch_case(
+        member_engine.generate_country_phone_number_batch, "Taiwan", True, True, False
+    ),
+    "email_batch": batch_case(member_engine.generate_email_batch, 10, False),
+    "email_hashed_batch": batch_case(member_engine.generate_email_batch, 10, True),
+    "psid_batch": batch_case(member_engine.generate_psid_id_batch, 16),
+    "sha256_hash": hash_case(1),
+    "sha256_hash_parallel": hash_case(None),
+    "tags_all_in_one": tags_case("all_in_one"),
+    "tags_separate_columns": tags_case("separate_columns"),
+    "tags_random": tags_case("random"),
+    "tags_random_count": tags_case("random", True),
+    "tags_even": tags_case("even"),
+    "tags_zipf_5000": tags_case("random", tags=MANY_TAGS, zipf_exponent=1.0),
+    "tags_zipf_5000_count": tags_case("random", True, MANY_TAGS, 1.0),
+    "tags_quota": quota_case(),
+    "tags_quota_count": quota_case(True),
+}
+
+EXPORT_CASES = {
+    "export_to_csv": export_case(True),
+    "export_to_csv_inline_write": export_case(False),
+    "export_to_csv_gzip": export_case(True, 'bench.csv.gz'),
+    "export_to_sqlite": export_case(True, 'bench.db'),
+    "export_to_xlsx": export_case(True, 'bench.xlsx'),
+}
+if pyarrow is not None:
+    EXPORT_CASES["export_to_parquet"] = export_case(True, 'bench.parquet')
+    EXPORT_CASES["export_to_arrow"] = export_case(True, 'bench.arrow')
+
+CASES = {**GENERATOR_CASES, **EXPORT_CASES}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(name, rows, repeat):
+    case = CASES[name]
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        measured = case(rows)
+        # Cases with setup to exclude return their own timing in seconds.
+        if isinstance(measured, float):
+            timings.append(measured)
+        else:
+            timings.append(time.perf_counter() - started_at)
+
+    seconds = min(timings)
+    return {
+        "name": name,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(name, rows, repeat):
+    # A fresh interpreter per case keeps peak RSS from leaking between cases.
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_case, name, rows, repeat).result()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    previous = {(r["name"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["name"], result["rows"]))
+        if not old or not old["rows_per_second"] or not result["rows_per_second"]:
+            continue
+        ratio = result["rows_per_second"] / old["rows_per_second"]
+        result["baseline_ratio"] = ratio
+        if ratio < 1 - threshold:
+            regressions.append(result)
+    return regressions
+
+
+def print_result(result):
+    ratio = result.get("baseline_ratio")
+    ratio_text = f"  x{ratio:.2f}" if ratio is not None else ""
+    print(
+        f"{result['name']:<28}{result['rows']:>12,} rows"
+        f"{result['rows_per_second'] or 0:>16,.0f} rows/s"
+        f"{result['peak_rss_mb']:>10.1f} MB{ratio_text}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m member_bench')
+    parser.add_argument("--generator-rows", type=int, default=100_000)
+    parser.add_argument(
+        "--export-rows", type=int, nargs='+', default=[10**4, 10**5, 10**6],
+        help="e.g. 10000 100000 1000000 10000000 100000000",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs='+', choices=sorted(CASES), default=None)
+    parser.add_argument("--output", default=None, help="JSON 結果輸出路徑")
+    parser.add_argument("--compare", default=None, help="要比較的先前 JSON 結果")
+    parser.add_argument("--threshold", type=float, default=0.1, help="視為效能退步的比例")
+    args = parser.parse_args(argv)
+
+    plan = [(name, args.generator_rows, args.repeat) for name in GENERATOR_CASES]
+    plan += [(name, rows, 1) for name in EXPORT_CASES for rows in args.export_rows]
+    if args.only:
+        plan = [job for job in plan if job[0] in args.only]
+
+    results = []
+    for name, rows, repeat in plan:
+        results.append(run_isolated(name, rows, repeat))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+
+    for result in results:
+        print_result(result)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    output = args.output or f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, mode='w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"結果已寫入: {output}")
+
+    if regressions:
+        for result in regressions:
+            print(f"效能退步: {result['name']} ({result['rows']:,} rows)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from .alias import AliasTable, zipf_weights
+from .columnar import export_columnar
+from .config import DEFAULT_CONFIG, OUTPUT_FORMATS, TAG_LAYOUTS, TAG_OPTIONS, normalize_config
+from .export import (
+    default_export_path,
+    export_member_list,
+    member_output_path,
+    resume_member_list,
+)
+from .fast_csv import write_csv_batches
+from .generators import (
+    generate_country_phone_number,
+    generate_country_phone_number_batch,
+    generate_email,
+    generate_email_batch,
+    generate_line_uid,
+    generate_line_uid_batch,
+    generate_member_id,
+    generate_member_id_batch,
+    generate_phone_number,
+    generate_phone_number_batch,
+    generate_psid_id,
+    generate_psid_id_batch,
+    hash_phone_number,
+    sample_tag_csr,
+)
+from .hashing import ParallelHasher, hash_values
+from .pipeline import (
+    build_edge_header,
+    build_header,
+    build_quoted_columns,
+    compile_row_plan,
+    get_row,
+    iter_member_rows,
+    iter_row_batches,
+    tag_edge_path,
+)
+from .rng import CounterRNG
+from .sharded import PROGRESS_INTERVAL, GenerationCancelled, export_sharded_csv
+from .tags import generate_tags, iter_tags
@@ -0,0 +1,47 @@
+import numpy as np
+
+from .generators import _get_rng
+
+# Alias probabilities are stored as 32-bit thresholds so one integers() word
+# decides each draw, on numpy Generators and CounterRNG alike.
+THRESHOLD_SCALE = 2**32
+
+
+def zipf_weights(count, exponent=1.0):
+    return (1.0 / np.arange(1, count + 1) ** exponent).tolist()
+
+
+class AliasTable:
+    # Vose's alias method: O(k) to build, then every draw is one column pick
+    # plus one threshold compare, regardless of how many outcomes there are.
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        count = len(weights)
+        scaled = weights * count / weights.sum()
+
+        prob = np.ones(count)
+        alias = np.arange(count)
+        small = [i for i in range(count) if scaled[i] < 1.0]
+        large = [i for i in range(count) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        self.count = count
+        self.weights = weights
+        # Tags that can be drawn at all; a row can't hold more distinct ones.
+        self.positive = int(np.count_nonzero(weights))
+        self.alias = alias
+        self.thresholds = np.minimum(
+            np.round(prob * THRESHOLD_SCALE), THRESHOLD_SCALE
+        ).astype(np.uint64)
+
+    def draw(self, size, rng=None):
+        rng = _get_rng(rng)
+        columns = rng.integers(0, self.count, size=size)
+        words = rng.integers(0, THRESHOLD_SCALE, size=size, dtype=np.uint64)
+        return np.where(words < self.thresholds[columns], columns, self.alias[columns])
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+# Read size when re-hashing the part of an output a checkpoint covers.
+DIGEST_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def checkpoint_path(file_path):
+    return f"{file_path}.checkpoint.json"
+
+
+def sync_output(file):
+    # Pushes everything written so far to disk and returns the file size, so
+    # a checkpoint never points past bytes a crash could still lose.
+    file.flush()
+    os.fsync(file.fileno())
+    return file.tell()
+
+
+def save_checkpoint(file_path, state):
+    path = checkpoint_path(file_path)
+    temporary = f"{path}.tmp"
+    with open(temporary, mode='w', encoding='utf-8') as file:
+        json.dump(state, file, ensure_ascii=False, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def file_digest(file_path, size):
+    sha256 = hashlib.sha256()
+    with open(file_path, mode='rb') as file:
+        while size > 0:
+            chunk = file.read(min(DIGEST_CHUNK_SIZE, size))
+            if not chunk:
+                break
+            sha256.update(chunk)
+            size -= len(chunk)
+    return sha256
+
+
+def load_checkpoint(file_path):
+    # Returns the state and the SHA-256 of each output up to its offset, so
+    # the resumed writer can keep hashing where the checkpoint left off. The
+    # hash also rejects a file another export has since written over.
+    path = checkpoint_path(file_path)
+    if not os.path.exists(path):
+        raise ValueError(f"找不到斷點檔案: {path}")
+    with open(path, encoding='utf-8') as file:
+        state = json.load(file)
+
+    outputs = [(file_path, state["offset"], state["sha256"])]
+    if state["edge_offset"] is not None:
+        outputs.append((state["edge_path"], state["edge_offset"], state["edge_sha256"]))
+    digests = []
+    for path, offset, expected in outputs:
+        if not os.path.exists(path) or os.path.getsize(path) < offset:
+            raise ValueError(f"{path} 比斷點記錄的長度短，無法續傳")
+        digest = file_digest(path, offset)
+        if digest.hexdigest() != expected:
+            raise ValueError(f"{path} 的內容與斷點記錄不符，可能已被覆寫，無法續傳")
+        digests.append(digest)
+    return state, digests
+
+
+def remove_checkpoint(file_path):
+    path = checkpoint_path(file_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def checkpoint_batches(batches, every, save, rows_done=0):
+    # save(rows_done) runs when the consumer asks for the batch after a
+    # multiple of every rows, i.e. once everything before it has been written.
+    # A resumed run passes its starting rows_done so checkpoints land on the
+    # same rows as in the original run.
+    next_checkpoint = (rows_done // every + 1) * every
+    for n, columns in batches:
+        yield n, columns
+        rows_done += n
+        if rows_done >= next_checkpoint:
+            save(rows_done)
+            next_checkpoint = (rows_done // every + 1) * every
@@ -0,0 +1,172 @@
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from .pipeline import (
+    build_edge_header,
+    build_header,
+    edge_key_column,
+    iter_row_batches,
+    tag_edge_path,
+)
+from .rng import CounterRNG
+from .sharded import track_batches
+from .split import is_split
+
+
+def tag_dictionary_type():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def member_schema(config):
+    # Generated columns are strings (IDs keep their leading zeros); tags are
+    # dictionary-encoded, as a list per member unless each tag has a column.
+    header = build_header(config)
+    fields = []
+    if config["tag_layout"] == "wide":
+        if config["tag_option"] == "separate_columns":
+            tag_count = len(config["tags"])
+            fields = [
+                pa.field(name, tag_dictionary_type()) for name in header[len(header) - tag_count:]
+            ]
+        else:
+            fields = [pa.field(header[-1], pa.list_(tag_dictionary_type()))]
+        header = header[: len(header) - len(fields)]
+    return pa.schema([pa.field(name, pa.string()) for name in header] + fields)
+
+
+def edge_schema(config):
+    key_title, tag_title = build_edge_header(config)
+    return pa.schema([pa.field(key_title, pa.string()), pa.field(tag_title, tag_dictionary_type())])
+
+
+def string_array(values):
+    # Character buffers become an Arrow string array without copying: fixed
+    # width means the offsets are just multiples of it, and the buffers hold
+    # UTF-8 (see literal_chars), which is what Arrow strings are.
+    if not isinstance(values, np.ndarray):
+        return pa.array(values, type=pa.string())
+    n, width = values.shape
+    offsets = np.arange(n + 1, dtype=np.int32) * width
+    return pa.StringArray.from_buffers(n, pa.py_buffer(offsets), pa.py_buffer(values))
+
+
+def tag_arrays(config, names, n, offsets, indices):
+    indices = indices.astype(np.int32)
+    if config["tag_option"] == "separate_columns":
+        by_member = indices.reshape(n, len(names))
+        return [
+            pa.DictionaryArray.from_arrays(np.ascontiguousarray(by_member[:, j]), names)
+            for j in range(len(names))
+        ]
+    values = pa.DictionaryArray.from_arrays(indices, names)
+    return [pa.ListArray.from_arrays(offsets.astype(np.int32), values)]
+
+
+class ParquetSink:
+    # One row group per generated batch, or row groups of exactly
+    # row_group_size rows gathered across batches when that is set.
+    def __init__(self, file_path, schema, config):
+        self.schema = schema
+        self.row_group_size = config["row_group_size"]
+        self.pending = []
+        self.pending_rows = 0
+        self.writer = pq.ParquetWriter(
+            file_path,
+            schema,
+            compression=config["compression"] or "snappy",
+            compression_level=config["compression_level"],
+        )
+
+    def write(self, batch):
+        self.pending.append(batch)
+        self.pending_rows += batch.num_rows
+        if self.row_group_size is None:
+            self.flush(batch.num_rows)
+        elif self.pending_rows >= self.row_group_size:
+            self.flush(self.pending_rows - self.pending_rows % self.row_group_size)
+
+    def flush(self, rows):
+        table = pa.Table.from_batches(self.pending, self.schema)
+        self.writer.write_table(table.slice(0, rows), row_group_size=self.row_group_size or rows)
+        self.pending = table.slice(rows).to_batches()
+        self.pending_rows -= rows
+
+    def close(self):
+        if self.pending_rows:
+            self.flush(self.pending_rows)
+        self.writer.close()
+
+
+class ArrowSink:
+    # Arrow IPC file: each generated batch is one record batch.
+    def __init__(self, file_path, schema, config):
+        if config["compression"] == "gzip":
+            raise ValueError("Arrow IPC 檔案不支援 gzip 壓縮，請改用 zstd")
+        options = pa.ipc.IpcWriteOptions(compression=config["compression"])
+        self.schema = schema
+        self.writer = pa.ipc.new_file(file_path, schema, options=options)
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+
+
+def open_columnar_sink(file_path, schema, config):
+    sink_class = ParquetSink if config["output_format"] == "parquet" else ArrowSink
+    return sink_class(file_path, schema, config)
+
+
+def write_columnar_batches(config, rng, members, edges=None, cancel_event=None, on_progress=None):
+    # Batches go from the column buffers straight into Arrow arrays; tags come
+    # in as CSR and become dictionary indices without formatting any strings.
+    names = pa.array(config["tags"], type=pa.string())
+    key_index = edge_key_column(config)[0] if edges is not None else None
+    assignments = []
+    batches = iter_row_batches(
+        config,
+        rng,
+        on_tags=lambda n, offsets, indices: assignments.append((offsets, indices)),
+        raw=True,
+    )
+
+    for n, columns in track_batches(batches, cancel_event, on_progress):
+        offsets, indices = assignments.pop()
+        arrays = [string_array(values) for values in columns]
+        if edges is None:
+            arrays += tag_arrays(config, names, n, offsets, indices)
+        else:
+            owners = np.repeat(np.arange(n, dtype=np.int32), np.diff(offsets))
+            tags = pa.DictionaryArray.from_arrays(indices.astype(np.int32), names)
+            keys = arrays[key_index].take(owners)
+            edges.write(pa.record_batch([keys, tags], schema=edges.schema))
+        members.write(pa.record_batch(arrays, schema=members.schema))
+
+
+def export_columnar(config, file_path, seed=None, cancel_event=None, on_progress=None):
+    if pa is None:
+        raise ValueError("輸出 Parquet/Arrow 檔案需要安裝 pyarrow 套件")
+    if is_split(config):
+        raise ValueError("Parquet/Arrow 輸出不支援分割檔案")
+
+    rng = CounterRNG(seed) if seed is not None else None
+    sinks = []
+    try:
+        members = open_columnar_sink(file_path, member_schema(config), config)
+        sinks.append(members)
+        edges = None
+        if config["tag_layout"] == "long":
+            edges = open_columnar_sink(tag_edge_path(file_path), edge_schema(config), config)
+            sinks.append(edges)
+        write_columnar_batches(config, rng, members, edges, cancel_event, on_progress)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return file_path
@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .fast_csv import WRITE_BUFFER_SIZE
+
+COMPRESSED_EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+# Each block becomes one gzip member / zstd frame; both formats allow them
+# to be concatenated, so blocks compress independently and in parallel.
+BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def split_extension(file_path):
+    # "list.csv.gz" -> ("list", ".csv.gz"), so suffixes go before both parts.
+    root, extension = os.path.splitext(file_path)
+    if extension.lower() in COMPRESSED_EXTENSIONS:
+        root, inner = os.path.splitext(root)
+        extension = inner + extension
+    return root, extension
+
+
+def compression_for_path(file_path):
+    return COMPRESSED_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+
+def with_compression_extension(file_path, compression):
+    if compression is None or compression_for_path(file_path) == compression:
+        return file_path
+    return file_path + COMPRESSION_EXTENSIONS[compression]
+
+
+def compress_gzip(data, level):
+    # mtime=0 keeps the output reproducible for a given seed.
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class BlockCompressor:
+    # File-like wrapper that cuts the stream into BLOCK_SIZE blocks and
+    # compresses them on a thread pool (zlib and zstd release the GIL),
+    # writing finished blocks to the underlying file in order.
+    def __init__(self, file, compression, level=None, workers=None):
+        self.file = file
+        self.compress = compress_gzip if compression == "gzip" else compress_zstd
+        self.level = DEFAULT_LEVELS[compression] if level is None else level
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.pending = deque()
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BLOCK_SIZE:
+            self.submit(bytes(self.buffer[:BLOCK_SIZE]))
+            del self.buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def submit(self, block):
+        self.pending.append(self.executor.submit(self.compress, block, self.level))
+        # Bounded lookahead keeps memory at a few blocks per worker.
+        while len(self.pending) > 2 * self.workers:
+            self.file.write(self.pending.popleft().result())
+
+    def flush(self):
+        # Ends the current block early, so everything written so far is on
+        # the file as whole gzip members / zstd frames.
+        if self.buffer:
+            self.submit(bytes(self.buffer))
+            self.buffer.clear()
+        while self.pending:
+            self.file.write(self.pending.popleft().result())
+        self.file.flush()
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.executor.shutdown(cancel_futures=True)
+            self.file.close()
+
+
+class DigestFile:
+    # Counts and hashes the bytes on their way to the file, after compression.
+    # sha256 may carry on from a hash of what the file already holds.
+    def __init__(self, file, sha256=None):
+        self.file = file
+        self.size = 0
+        self.sha256 = sha256 or hashlib.sha256()
+
+    def write(self, data):
+        self.file.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def open_output(file_path, compression=None, level=None, workers=None, offset=None, wrap=None):
+    # With offset, an existing file is cut back to that size and appended to.
+    # wrap(file) sees the file on disk, below any compression.
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("輸出 .zst 檔案需要安裝 zstandard 套件")
+    if offset is None:
+        file = open(file_path, mode='wb', buffering=WRITE_BUFFER_SIZE)
+    else:
+        file = open(file_path, mode='r+b', buffering=WRITE_BUFFER_SIZE)
+        file.truncate(offset)
+        file.seek(offset)
+    if wrap is not None:
+        file = wrap(file)
+    if compression is None:
+        return file
+    return BlockCompressor(file, compression, level, workers)
+
+
+def open_config_output(config, file_path, offset=None, wrap=None):
+    return open_output(
+        file_path,
+        config["compression"],
+        config["compression_level"],
+        config["compression_workers"],
+        offset,
+        wrap,
+    )
@@ -0,0 +1,122 @@
+DEFAULT_CONFIG = {
+    "amount": 0,
+    "start": 0,
+    "include_title": True,
+    "line_uid_title": "",
+    "secure_line_uid": False,
+    "include_member_id": False,
+    "member_id_title": "Member ID",
+    "include_letters": False,
+    "letter_count": 0,
+    "id_length": 8,
+    "include_phone_number": False,
+    "phone_number_title": "Phone",
+    "country": None,
+    "include_country_code": True,
+    "country_code": "",
+    "include_plus": False,
+    "format_pattern": False,
+    "hash_numbers": False,
+    "email_title": "",
+    "email_length": 10,
+    "email_format_check": False,
+    "email_hash": False,
+    # None: one hash process per CPU, started only when a column is hashed.
+    "hash_workers": None,
+    "psid_title": "",
+    "psid_length": 16,
+    "tags": [],
+    "tag_title": "Tags",
+    "tag_option": None,
+    "tag_layout": "wide",
+    "distribute_evenly": False,
+    "random_tag_count": False,
+    "min_tags": 1,
+    "max_tags": 1,
+    "tag_weights": None,
+    "tag_zipf_exponent": None,
+    "tag_quotas": None,
+    "tag_percentages": None,
+    "total_amount": None,
+    "unique_ids": False,
+    "background_write": True,
+    "split_rows": None,
+    "split_bytes": None,
+    "compression": None,
+    "compression_level": None,
+    "compression_workers": None,
+    "output_format": None,
+    "row_group_size": None,
+    "sqlite_table": "members",
+    "sqlite_indexes": None,
+    "checkpoint_rows": None,
+}
+
+TAG_OPTIONS = ("all_in_one", "separate_columns", "random", "even", "quota")
+# wide: tags in the members file; long: a separate member,tag edge file.
+TAG_LAYOUTS = ("wide", "long")
+COMPRESSIONS = ("gzip", "zstd")
+OUTPUT_FORMATS = ("csv", "parquet", "arrow", "sqlite", "xlsx")
+
+
+def normalize_config(config):
+    config = {**DEFAULT_CONFIG, **config}
+
+    # Configs written for import_random.py describe tags with distribute_evenly.
+    if config["tag_option"] is None:
+        if config["random_tag_count"] or not config["distribute_evenly"]:
+            config["tag_option"] = "random"
+        else:
+            config["tag_option"] = "even"
+
+    if config["tag_option"] not in TAG_OPTIONS:
+        raise ValueError(f"Unknown tag_option: {config['tag_option']}")
+    if config["tag_option"] in ("random", "even", "quota") and not config["tags"]:
+        raise ValueError(f"{config['tag_option']} 模式至少需要一個標籤")
+
+    if config["tag_layout"] not in TAG_LAYOUTS:
+        raise ValueError(f"Unknown tag_layout: {config['tag_layout']}")
+    if config["tag_layout"] == "long" and not (
+        config["include_member_id"] or config["line_uid_title"]
+    ):
+        raise ValueError("長格式標籤檔需要會員編號或 LINE UID 作為關聯欄位")
+
+    if config["compression"] is not None and config["compression"] not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {config['compression']}")
+
+    if config["output_format"] is not None and config["output_format"] not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output_format: {config['output_format']}")
+
+    if not config["sqlite_table"]:
+        raise ValueError("sqlite_table 不可為空白")
+
+    for key in ("split_rows", "split_bytes", "row_group_size", "checkpoint_rows", "hash_workers"):
+        if config[key] is not None and config[key] <= 0:
+            raise ValueError(f"{key} 必須大於 0")
+
+    if config["tag_option"] == "random" and config["random_tag_count"]:
+        if not 1 <= config["min_tags"] <= config["max_tags"]:
+            raise ValueError("標籤數量必須滿足 1 <= min_tags <= max_tags")
+        if config["min_tags"] > len(config["tags"]):
+            raise ValueError("min_tags 不可大於標籤數量")
+
+    # Quotas are spread over the whole run, not over one shard or batch of it.
+    if config["total_amount"] is None:
+        config["total_amount"] = config["start"] + config["amount"]
+
+    for key in ("tag_quotas", "tag_percentages"):
+        if config[key] is not None and len(config[key]) != len(config["tags"]):
+            raise ValueError(f"{key} 的數量必須與標籤數量相同")
+
+    weights = config["tag_weights"]
+    if weights is not None:
+        if len(weights) != len(config["tags"]):
+            raise ValueError("tag_weights 的數量必須與標籤數量相同")
+        if min(weights, default=0) < 0 or sum(weights) <= 0:
+            raise ValueError("tag_weights 不可為負數，且總和必須大於 0")
+        # Zero-weight tags are never drawn, so they cannot make up min_tags.
+        positive = sum(1 for weight in weights if weight > 0)
+        if config["random_tag_count"] and config["min_tags"] > positive:
+            raise ValueError("min_tags 不可大於權重大於 0 的標籤數量")
+
+    return config
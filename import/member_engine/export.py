@@ -0,0 +1,276 @@
+import os
+from contextlib import ExitStack
+from datetime import datetime
+from functools import partial
+
+from .checkpoint import (
+    checkpoint_batches,
+    load_checkpoint,
+    remove_checkpoint,
+    save_checkpoint,
+    sync_output,
+)
+from .columnar import export_columnar
+from .compression import (
+    DigestFile,
+    compression_for_path,
+    open_config_output,
+    split_extension,
+    with_compression_extension,
+)
+from .config import normalize_config
+from .fast_csv import CsvSink, write_csv_batches
+from .pipeline import (
+    EDGE_QUOTED_COLUMNS,
+    build_edge_header,
+    build_header,
+    build_quoted_columns,
+    iter_row_batches,
+    tag_edge_path,
+)
+from .rng import CounterRNG
+from .sharded import export_sharded_csv, new_master_seed, track_batches
+from .sqlite import export_sqlite
+from .split import (
+    SplitCsvWriter,
+    is_split,
+    manifest_path,
+    split_part_path,
+    write_manifest,
+    write_split_batches,
+)
+from .xlsx import export_xlsx
+
+
+OUTPUT_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+    ".xlsx": "xlsx",
+}
+FORMAT_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "sqlite": ".db",
+    "xlsx": ".xlsx",
+}
+
+
+def default_export_path():
+    file_name = f"member_list_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return os.path.expanduser(f"~/Downloads/{file_name}")
+
+
+def output_format_for_path(file_path):
+    # "list.parquet" and "list.parquet.zst" are both Parquet.
+    extension = os.path.splitext(split_extension(file_path)[1])[0]
+    return OUTPUT_EXTENSIONS.get(extension.lower(), "csv")
+
+
+def with_format_extension(file_path, output_format):
+    if output_format == "csv" or output_format_for_path(file_path) == output_format:
+        return file_path
+    root, extension = split_extension(file_path)
+    if os.path.splitext(extension)[0].lower() == ".csv":
+        file_path = root
+    return file_path + FORMAT_EXTENSIONS[output_format]
+
+
+def resolve_output_path(config, file_path):
+    # Fills in compression and output_format from the path when the config
+    # leaves them open, and returns the path the export really writes to.
+    if config["compression"] is None:
+        config["compression"] = compression_for_path(file_path)
+    if config["output_format"] is None:
+        config["output_format"] = output_format_for_path(file_path)
+    file_path = with_format_extension(file_path, config["output_format"])
+    if config["output_format"] == "csv":
+        file_path = with_compression_extension(file_path, config["compression"])
+    return file_path
+
+
+def member_output_path(config, file_path=None):
+    return resolve_output_path(normalize_config(config), file_path or default_export_path())
+
+
+def export_member_list(
+    config, file_path=None, workers=1, seed=None, cancel_event=None, on_progress=None
+):
+    config = normalize_config(config)
+    file_path = resolve_output_path(config, file_path or default_export_path())
+    if config["checkpoint_rows"] is not None and config["output_format"] != "csv":
+        raise ValueError("斷點續傳僅支援 CSV 輸出")
+    # Columnar files and databases are written by this process; the rows
+    # match a CSV export with the same seed.
+    if config["output_format"] == "sqlite":
+        return export_sqlite(config, file_path, seed, cancel_event, on_progress), seed
+    if config["output_format"] == "xlsx":
+        return export_xlsx(config, file_path, seed, cancel_event, on_progress), seed
+    if config["output_format"] != "csv":
+        return export_columnar(config, file_path, seed, cancel_event, on_progress), seed
+
+    header = build_header(config) if config["include_title"] else None
+    quoted_columns = build_quoted_columns(config)
+    edges = None
+    if config["tag_layout"] == "long":
+        edge_header = build_edge_header(config) if config["include_title"] else None
+        edges = (tag_edge_path(file_path), edge_header, EDGE_QUOTED_COLUMNS)
+
+    # A checkpoint left at this path by an earlier run no longer matches what
+    # this run writes, so it goes before the file is touched.
+    remove_checkpoint(file_path)
+    if config["checkpoint_rows"] is not None:
+        if workers > 1 or is_split(config):
+            raise ValueError("斷點續傳僅支援單一工作程序且不分割的輸出")
+        # Resuming regenerates rows from the seed, so a checkpointed run needs one.
+        if seed is None:
+            seed = new_master_seed()
+
+    if workers > 1:
+        seed = export_sharded_csv(
+            iter_row_batches,
+            config,
+            header,
+            file_path,
+            workers,
+            seed,
+            cancel_event=cancel_event,
+            on_progress=on_progress,
+            quoted_columns=quoted_columns,
+            edges=edges,
+        )
+        if is_split(config):
+            file_path = manifest_path(file_path)
+    else:
+        file_path = write_member_csv(
+            config, file_path, header, quoted_columns, edges, seed, cancel_event, on_progress
+        )
+
+    return file_path, seed
+
+
+def write_member_csv(
+    config,
+    file_path,
+    header,
+    quoted_columns,
+    edges,
+    seed,
+    cancel_event=None,
+    on_progress=None,
+    resume=None,
+    digests=None,
+):
+    rng = CounterRNG(seed) if seed is not None else None
+    rows_done = resume["rows"] if resume is not None else 0
+    run_config = dict(
+        config, start=config["start"] + rows_done, amount=config["amount"] - rows_done
+    )
+    # A resumed file already has its BOM and header.
+    encoding = 'utf-8' if resume is not None else 'utf-8-sig'
+    # Checkpoints record a hash of the bytes on disk up to each offset; a
+    # resumed run carries on from the hashes load_checkpoint computed.
+    checkpointed = config["checkpoint_rows"] is not None
+    digests = digests or [None, None]
+    disk_files = {}
+
+    def open_checkpointed(path, offset, sha256):
+        if not checkpointed:
+            return open_config_output(config, path, offset)
+
+        def wrap(file):
+            disk_files[path] = DigestFile(file, sha256)
+            return disk_files[path]
+
+        return open_config_output(config, path, offset, wrap)
+
+    with ExitStack() as stack:
+        on_edges = None
+        edge_file = None
+        if edges is not None:
+            edge_path, edge_header, edge_quoted_columns = edges
+            edge_offset = resume["edge_offset"] if resume is not None else None
+            edge_file = stack.enter_context(open_checkpointed(edge_path, edge_offset, digests[1]))
+            on_edges = CsvSink(edge_file, edge_header, edge_quoted_columns, encoding).write
+        batches = iter_row_batches(run_config, rng, on_edges)
+
+        if is_split(config):
+            writer = SplitCsvWriter(
+                lambda index: split_part_path(file_path, index + 1),
+                header,
+                quoted_columns,
+                max_rows=config["split_rows"],
+                max_bytes=config["split_bytes"],
+                open_file=partial(open_config_output, config),
+            )
+            parts = write_split_batches(track_batches(batches, cancel_event, on_progress), writer)
+            return write_manifest(
+                file_path, parts, header, seed, config["split_rows"], config["split_bytes"]
+            )
+
+        offset = resume["offset"] if resume is not None else None
+        file = stack.enter_context(open_checkpointed(file_path, offset, digests[0]))
+        background = config["background_write"]
+        if checkpointed:
+
+            def save(rows):
+                # The RNG state is just (seed, row): CounterRNG is row-addressable.
+                state = {
+                    "seed": seed,
+                    "config": config,
+                    "rows": rows,
+                    "offset": sync_output(file),
+                    "sha256": disk_files[file_path].sha256.hexdigest(),
+                    "edge_path": None,
+                    "edge_offset": None,
+                    "edge_sha256": None,
+                }
+                if edge_file is not None:
+                    state["edge_path"] = edge_path
+                    state["edge_offset"] = sync_output(edge_file)
+                    state["edge_sha256"] = disk_files[edge_path].sha256.hexdigest()
+                save_checkpoint(file_path, state)
+
+            batches = checkpoint_batches(batches, config["checkpoint_rows"], save, rows_done)
+            # A checkpoint must only count batches already written to the file.
+            background = False
+        write_csv_batches(
+            track_batches(batches, cancel_event, on_progress),
+            header,
+            file,
+            quoted_columns,
+            encoding,
+            background,
+        )
+
+    # Also drops a stale checkpoint left by an earlier run to this path.
+    remove_checkpoint(file_path)
+    return file_path
+
+
+def resume_member_list(file_path, cancel_event=None, on_progress=None):
+    # Cuts the output back to the last checkpoint and generates the rest; the
+    # finished file has the same bytes as an uninterrupted run.
+    state, digests = load_checkpoint(file_path)
+    config = state["config"]
+    edges = None
+    if state["edge_path"] is not None:
+        edges = (state["edge_path"], None, EDGE_QUOTED_COLUMNS)
+    write_member_csv(
+        config,
+        file_path,
+        None,
+        build_quoted_columns(config),
+        edges,
+        state["seed"],
+        cancel_event,
+        on_progress,
+        state,
+        digests,
+    )
+    return file_path, state["seed"]
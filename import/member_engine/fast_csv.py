@@ -0,0 +1,128 @@
+import codecs
+import csv
+import io
+import queue
+import threading
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Batches in flight between the generator and the writer thread; two gives
+# double buffering while capping memory at a couple of batches.
+WRITE_QUEUE_DEPTH = 2
+LINE_TERMINATOR = '\r\n'
+# Characters that make csv.QUOTE_MINIMAL quote a field in the default dialect.
+SPECIAL_CHARS = (',', '"', '\r', '\n')
+
+
+def quote_field(value):
+    if any(char in value for char in SPECIAL_CHARS):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def quote_column(values, lone=False):
+    # Tag columns repeat a handful of distinct values, so quote each one once.
+    quoted = {value: quote_field(value) for value in set(values)}
+    if lone and '' in quoted:
+        # csv writes a row made of one empty field as "" so it is not a blank line.
+        quoted[''] = '""'
+    return [quoted[value] for value in values]
+
+
+def format_header(header):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(header)
+    return buffer.getvalue()
+
+
+def format_lines(columns, quoted_columns=None):
+    lone = len(columns) == 1
+    columns = [
+        quote_column(values, lone) if quoted_columns is None or i in quoted_columns else values
+        for i, values in enumerate(columns)
+    ]
+    return list(map(','.join, zip(*columns)))
+
+
+def format_batch(columns, quoted_columns=None):
+    return LINE_TERMINATOR.join(format_lines(columns, quoted_columns)) + LINE_TERMINATOR
+
+
+class CsvSink:
+    # Push-style writer for a second file filled from inside the batch loop.
+    def __init__(self, file, header=None, quoted_columns=None, encoding='utf-8-sig'):
+        self.file = file
+        self.quoted_columns = quoted_columns
+        self.encode = codecs.getincrementalencoder(encoding)().encode
+        if header:
+            file.write(self.encode(format_header(header)))
+
+    def write(self, n, columns):
+        if n:
+            self.file.write(self.encode(format_batch(columns, self.quoted_columns)))
+
+
+class BackgroundWriter:
+    # Formats, encodes and writes batches on its own thread so the caller can
+    # generate the next batch while this one goes to disk.
+    def __init__(self, file, encode, quoted_columns=None, depth=WRITE_QUEUE_DEPTH):
+        self.file = file
+        self.encode = encode
+        self.quoted_columns = quoted_columns
+        self.queue = queue.Queue(maxsize=depth)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            columns = self.queue.get()
+            if columns is None:
+                return
+            # After a failed write keep draining, so put() never blocks forever.
+            if self.error is None:
+                try:
+                    self.file.write(self.encode(format_batch(columns, self.quoted_columns)))
+                except BaseException as e:
+                    self.error = e
+
+    def put(self, columns):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(columns)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        elif self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+
+def write_csv_batches(
+    batches, header, file, quoted_columns=None, encoding='utf-8-sig', background=False
+):
+    # The incremental encoder emits the utf-8-sig BOM once, before the first write.
+    encode = codecs.getincrementalencoder(encoding)().encode
+    if header:
+        file.write(encode(format_header(header)))
+
+    if background:
+        with BackgroundWriter(file, encode, quoted_columns) as writer:
+            for _, columns in batches:
+                if columns:
+                    writer.put(columns)
+        return
+
+    for _, columns in batches:
+        if columns:
+            file.write(encode(format_batch(columns, quoted_columns)))
@@ -0,0 +1,237 @@
+import hashlib
+import random
+import re
+import secrets
+import string
+
+import numpy as np
+
+from .hashing import hash_values
+
+DIGITS = np.frombuffer(b'0123456789', dtype=np.uint8)
+NONZERO_DIGITS = np.frombuffer(b'123456789', dtype=np.uint8)
+HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+UPPERCASE = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', dtype=np.uint8)
+LOWERCASE = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz', dtype=np.uint8)
+LOWERCASE_DIGITS = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz0123456789', dtype=np.uint8)
+
+_default_rng = np.random.default_rng()
+
+
+def _get_rng(rng):
+    return _default_rng if rng is None else rng
+
+
+def literal_chars(text, n):
+    # UTF-8, so user text such as a full-width country code still has the
+    # same byte width on every row.
+    return np.tile(np.frombuffer(text.encode('utf-8'), dtype=np.uint8), (n, 1))
+
+
+def random_chars(alphabet, n, k, rng=None):
+    rng = _get_rng(rng)
+    return alphabet[rng.integers(0, len(alphabet), size=(n, k), dtype=np.uint8)]
+
+
+def to_strings(buffer, raw=False):
+    # With raw the (n, width) character buffer itself is the column, for
+    # writers that can take fixed-width bytes without a str per value.
+    if raw:
+        return np.ascontiguousarray(buffer)
+    n, width = buffer.shape
+    if width == 0:
+        return [''] * n
+    values = np.ascontiguousarray(buffer).view(f'S{width}').ravel()
+    try:
+        return values.astype(f'U{width}').tolist()
+    except UnicodeDecodeError:
+        return np.char.decode(values, 'utf-8').tolist()
+
+
+def generate_line_uid_batch(n, rng=None, secure=False, raw=False):
+    # One block of entropy, one hex encode, one split: 16 random bytes per UID.
+    if secure:
+        entropy = secrets.token_bytes(16 * n)
+    else:
+        entropy = _get_rng(rng).integers(0, 256, size=(n, 16), dtype=np.uint8).tobytes()
+    if raw:
+        hex_chars = np.frombuffer(entropy.hex().encode('ascii'), dtype=np.uint8).reshape(n, 32)
+        return to_strings(np.hstack([literal_chars('U', n), hex_chars]), raw)
+    if n == 0:
+        return []
+    return ('U' + entropy.hex(' ', 16).replace(' ', ' U')).split(' ')
+
+
+def generate_member_id_batch(n, include_letters, letter_count, id_length, rng=None, raw=False):
+    if include_letters:
+        buffer = np.hstack(
+            [
+                random_chars(UPPERCASE, n, letter_count, rng),
+                random_chars(DIGITS, n, id_length - letter_count, rng),
+            ]
+        )
+    else:
+        buffer = random_chars(DIGITS, n, id_length, rng)
+    return to_strings(buffer, raw)
+
+
+def generate_psid_id_batch(n, id_length, rng=None, raw=False):
+    return to_strings(random_chars(DIGITS, n, id_length, rng), raw)
+
+
+def generate_number_batch(n, digit_count, rng=None):
+    # Same range as random.randint(10 ** (k - 1), 10 ** k - 1): no leading zero.
+    return np.hstack(
+        [
+            random_chars(NONZERO_DIGITS, n, 1, rng),
+            random_chars(DIGITS, n, digit_count - 1, rng),
+        ]
+    )
+
+
+def generate_phone_number_batch(
+    n, country_code, include_plus, format_pattern, rng=None, raw=False
+):
+    numbers = generate_number_batch(n, 9, rng)
+    if format_pattern:
+        numbers = np.hstack([numbers[:, :4], literal_chars(' ', n), numbers[:, 4:]])
+    prefix = phone_prefix(country_code, include_plus, format_pattern)
+    return to_strings(np.hstack([literal_chars(prefix, n), numbers]), raw)
+
+
+def phone_prefix(country_code, include_plus, format_pattern):
+    prefix = ''
+    if country_code:
+        prefix = f"+{country_code}" if include_plus else f"{country_code}"
+        if format_pattern:
+            prefix += ' '
+    return prefix
+
+
+def country_phone_prefix(country, include_country_code, include_plus):
+    if country == "Taiwan":
+        prefix = "8869" if include_country_code else "09"
+    elif country == "Hong Kong":
+        prefix = "852" if include_country_code else "9"
+    else:
+        raise ValueError(f"Unsupported country: {country}")
+    if include_country_code and include_plus:
+        prefix = f"+{prefix}"
+    return prefix
+
+
+def generate_country_phone_number_batch(
+    n, country, include_country_code, include_plus, format_pattern, rng=None, raw=False
+):
+    prefix = country_phone_prefix(country, include_country_code, include_plus)
+    buffer = np.hstack([literal_chars(prefix, n), generate_number_batch(n, 8, rng)])
+
+    if format_pattern:
+        tail = buffer[:, 4:] if country == "Taiwan" else buffer[:, 4:8]
+        buffer = np.hstack([buffer[:, :4], literal_chars(' ', n), tail])
+
+    return to_strings(buffer, raw)
+
+
+def hash_phone_number(phone_number):
+    return hashlib.sha256(phone_number.encode('utf-8')).hexdigest()
+
+
+def generate_email_batch(n, length, hash_email, rng=None, raw=False):
+    buffer = np.hstack(
+        [
+            random_chars(LOWERCASE_DIGITS, n, length, rng),
+            literal_chars('@', n),
+            random_chars(LOWERCASE, n, 5, rng),
+            literal_chars('.com', n),
+        ]
+    )
+
+    if hash_email:
+        return hash_values(to_strings(buffer))
+    return to_strings(buffer, raw)
+
+
+# The single-value generators below make the same strings as the batch ones
+# with the random module: building NumPy arrays for one value costs more than
+# the value itself.
+def random_number(digit_count):
+    return str(random.randint(10 ** (digit_count - 1), 10**digit_count - 1))
+
+
+def generate_line_uid(secure=False):
+    if secure:
+        return 'U' + secrets.token_hex(16)
+    return f"U{random.getrandbits(128):032x}"
+
+
+def generate_member_id(include_letters, letter_count, id_length):
+    if include_letters:
+        letters = ''.join(random.choices(string.ascii_uppercase, k=letter_count))
+        return letters + ''.join(random.choices(string.digits, k=id_length - letter_count))
+    return ''.join(random.choices(string.digits, k=id_length))
+
+
+def generate_psid_id(id_length):
+    return ''.join(random.choices(string.digits, k=id_length))
+
+
+def generate_phone_number(country_code, include_plus, format_pattern):
+    number = random_number(9)
+    if format_pattern:
+        number = f"{number[:4]} {number[4:]}"
+    return phone_prefix(country_code, include_plus, format_pattern) + number
+
+
+def generate_country_phone_number(country, include_country_code, include_plus, format_pattern):
+    number = country_phone_prefix(country, include_country_code, include_plus) + random_number(8)
+    if format_pattern:
+        tail = number[4:] if country == "Taiwan" else number[4:8]
+        number = f"{number[:4]} {tail}"
+    return number
+
+
+def generate_email(length, format_check, hash_email):
+    local_part = ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
+    email = f"{local_part}@{''.join(random.choices(string.ascii_lowercase, k=5))}.com"
+
+    if format_check:
+        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+            raise ValueError("Generated email is not in valid format")
+
+    if hash_email:
+        email = hashlib.sha256(email.encode('utf-8')).hexdigest()
+
+    return email
+
+
+def choose_tag_indices(n, tag_count, rng=None):
+    rng = _get_rng(rng)
+    return rng.integers(0, tag_count, size=n).tolist()
+
+
+def sample_tag_csr(n, tag_count, min_tags, max_tags, rng=None):
+    # Floyd's algorithm, one step per column across the whole batch: step s of
+    # a row with k tags picks from [0, tag_count - k + s], so a row costs
+    # O(max_tags**2) however many tags there are. Returns CSR offsets and
+    # indices, with each row's indices in tag order.
+    rng = _get_rng(rng)
+    counts = rng.integers(min_tags, max_tags + 1, size=n)
+    words = rng.integers(0, 2**32, size=(n, max_tags), dtype=np.uint64)
+    chosen = np.full((n, max_tags), tag_count, dtype=np.int64)
+    for step in range(max_tags):
+        top = tag_count - counts + step
+        span = np.maximum(top + 1, 0).astype(np.uint64)
+        picks = ((words[:, step] * span) >> np.uint64(32)).astype(np.int64)
+        taken = (chosen[:, :step] == picks[:, None]).any(axis=1)
+        chosen[:, step] = np.where(step < counts, np.where(taken, top, picks), tag_count)
+
+    chosen.sort(axis=1)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, chosen[chosen < tag_count]
+
+
+def split_csr(offsets, values):
+    offsets = offsets.tolist()
+    return [values[start:end] for start, end in zip(offsets, offsets[1:])]
@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from itertools import chain
+
+# Below this many values per worker, IPC costs more than the hashing it saves.
+MIN_CHUNK_SIZE = 2000
+
+
+def hash_values(values):
+    return [sha256(value.encode('utf-8')).hexdigest() for value in values]
+
+
+class ParallelHasher:
+    # hashlib only drops the GIL for inputs over 2 KiB, and phones/emails are a
+    # few dozen bytes, so chunks are hashed in worker processes, not threads.
+    def __init__(self, workers=None, min_chunk_size=MIN_CHUNK_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_chunk_size = min_chunk_size
+        self.executor = None
+
+    def chunk_size(self, count):
+        return max(self.min_chunk_size, -(-count // self.workers))
+
+    def lookahead(self, batch_size):
+        # Batches to keep hashing while later ones are generated, enough to
+        # give every worker a chunk.
+        if self.workers <= 1:
+            return 0
+        chunks_per_batch = -(-batch_size // self.chunk_size(batch_size))
+        return -(-self.workers // chunks_per_batch)
+
+    def submit(self, values):
+        # Returns a function that gives the hashes, so the caller can go on
+        # generating while the workers hash.
+        chunk_size = self.chunk_size(len(values))
+        if self.workers <= 1 or len(values) <= chunk_size:
+            hashes = hash_values(values)
+            return lambda: hashes
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [
+            self.executor.submit(hash_values, values[i:i + chunk_size])
+            for i in range(0, len(values), chunk_size)
+        ]
+        return lambda: list(chain.from_iterable(future.result() for future in futures))
+
+    def hash(self, values):
+        return self.submit(values)()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
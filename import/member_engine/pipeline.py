@@ -0,0 +1,314 @@
+from collections import deque
+from itertools import repeat
+
+import numpy as np
+
+from .compression import split_extension
+from .config import normalize_config
+from .fast_csv import quote_field
+from .generators import (
+    generate_country_phone_number_batch,
+    generate_email_batch,
+    generate_line_uid_batch,
+    generate_member_id_batch,
+    generate_phone_number_batch,
+    generate_psid_id_batch,
+)
+from .hashing import ParallelHasher
+from .rng import CounterRNG, batch_rng
+from .tags import BATCH_SIZE, tag_assignment_producer, tag_column_producer
+from .unique import (
+    generate_unique_email_batch,
+    generate_unique_line_uid_batch,
+    generate_unique_member_id_batch,
+    permutation_seed,
+    row_indices,
+    unique_email_column,
+    unique_line_uid_column,
+    unique_member_id_column,
+)
+
+
+def build_header(config):
+    config = normalize_config(config)
+    header = []
+    if config["line_uid_title"]:
+        header.append(config["line_uid_title"])
+    if config["include_member_id"]:
+        header.append(config["member_id_title"])
+    if config["include_phone_number"]:
+        header.append(config["phone_number_title"])
+    if config["email_title"]:
+        header.append(config["email_title"])
+    if config["psid_title"]:
+        header.append(config["psid_title"])
+    if config["tag_layout"] == "long":
+        return header
+    if config["tag_option"] == "separate_columns":
+        header.extend([f'Tag{i+1}' for i in range(len(config["tags"]))])
+    else:
+        header.append(config["tag_title"])
+    return header
+
+
+# Edge files are (generated key, user-typed tag); only the tag can need quoting.
+EDGE_QUOTED_COLUMNS = {1}
+
+
+def edge_key_column(config):
+    # The long layout links tags to members by member ID, else by LINE UID.
+    if config["include_member_id"]:
+        return (1 if config["line_uid_title"] else 0), config["member_id_title"]
+    return 0, config["line_uid_title"]
+
+
+def build_edge_header(config):
+    config = normalize_config(config)
+    return [edge_key_column(config)[1], config["tag_title"]]
+
+
+def tag_edge_path(file_path):
+    root, extension = split_extension(file_path)
+    return f"{root}_tags{extension or '.csv'}"
+
+
+def build_quoted_columns(config, quote=quote_field):
+    # Generated values are hex, digits and lowercase letters; only text the user
+    # typed (tags, a custom country code) can hold a comma or a quote.
+    config = normalize_config(config)
+    quoted = set()
+    column = 0
+    if config["line_uid_title"]:
+        column += 1
+    if config["include_member_id"]:
+        column += 1
+    if config["include_phone_number"]:
+        country_code = config["country_code"] or ""
+        if not config["hash_numbers"] and quote(country_code) != country_code:
+            quoted.add(column)
+        column += 1
+    if config["email_title"]:
+        column += 1
+    if config["psid_title"]:
+        column += 1
+    if config["tag_layout"] == "long":
+        tag_columns = 0
+    elif config["tag_option"] == "separate_columns":
+        tag_columns = len(config["tags"])
+    else:
+        tag_columns = 1
+    quoted.update(range(column, column + tag_columns))
+    return quoted
+
+
+def unique_column_names(config):
+    if config["unique_ids"]:
+        return {"uid", "member_id", "email"}
+    # The tag file is joined to members on the key column, so in the long
+    # layout that column is unique even without unique_ids.
+    if config["tag_layout"] == "long":
+        return {"member_id" if config["include_member_id"] else "uid"}
+    return set()
+
+
+def build_unique_columns(config, seed, names):
+    unique_columns = {}
+    end = config["start"] + config["amount"]
+    if config["line_uid_title"] and "uid" in names:
+        unique_columns["uid"] = unique_line_uid_column(seed)
+        unique_columns["uid"].check_capacity(end, config["line_uid_title"])
+    if config["include_member_id"] and "member_id" in names:
+        unique_columns["member_id"] = unique_member_id_column(
+            config["include_letters"], config["letter_count"], config["id_length"], seed
+        )
+        unique_columns["member_id"].check_capacity(end, config["member_id_title"])
+    if config["email_title"] and "email" in names:
+        unique_columns["email"] = unique_email_column(config["email_length"], seed)
+        unique_columns["email"].check_capacity(end, config["email_title"])
+    return unique_columns
+
+
+def column_producer(batch_function, *args, **kwargs):
+    def produce(n, start, rng):
+        return [batch_function(n, *args, rng=rng, **kwargs)]
+
+    return produce
+
+
+def unique_column_producer(batch_function, column, *args, **kwargs):
+    def produce(n, start, rng):
+        return [batch_function(column, row_indices(start, n), *args, rng=rng, **kwargs)]
+
+    return produce
+
+
+def hashed_producer(producer, hasher):
+    # Leaves a pending hash in the column; iter_row_batches collects it later.
+    def produce(n, start, rng):
+        return [hasher.submit(values) for values in producer(n, start, rng)]
+
+    return produce
+
+
+def compile_row_plan(config, seed=None, hasher=None, raw=False, unique_names=None):
+    # Resolves every include_*/title/tag_option choice once, so the batch loop
+    # only calls the producers that make up this run's columns. With raw the
+    # generated columns that are not hashed come as character buffers.
+    if unique_names is None:
+        unique_names = unique_column_names(config)
+    unique_columns = build_unique_columns(config, seed, unique_names)
+    producers = []
+
+    if config["line_uid_title"]:
+        if "uid" in unique_columns:
+            producers.append(
+                unique_column_producer(
+                    generate_unique_line_uid_batch, unique_columns["uid"], raw=raw
+                )
+            )
+        else:
+            producers.append(
+                column_producer(
+                    generate_line_uid_batch, secure=config["secure_line_uid"], raw=raw
+                )
+            )
+
+    if config["include_member_id"]:
+        if "member_id" in unique_columns:
+            producers.append(
+                unique_column_producer(
+                    generate_unique_member_id_batch, unique_columns["member_id"], raw=raw
+                )
+            )
+        else:
+            producers.append(
+                column_producer(
+                    generate_member_id_batch,
+                    config["include_letters"],
+                    config["letter_count"],
+                    config["id_length"],
+                    raw=raw,
+                )
+            )
+
+    if config["include_phone_number"]:
+        phone_raw = raw and not config["hash_numbers"]
+        if config["country"]:
+            phone_producer = column_producer(
+                generate_country_phone_number_batch,
+                config["country"],
+                config["include_country_code"],
+                config["include_plus"],
+                config["format_pattern"],
+                raw=phone_raw,
+            )
+        else:
+            phone_producer = column_producer(
+                generate_phone_number_batch,
+                config["country_code"],
+                config["include_plus"],
+                config["format_pattern"],
+                raw=phone_raw,
+            )
+        if config["hash_numbers"]:
+            phone_producer = hashed_producer(phone_producer, hasher)
+        producers.append(phone_producer)
+
+    if config["email_title"]:
+        email_raw = raw and not config["email_hash"]
+        if "email" in unique_columns:
+            email_producer = unique_column_producer(
+                generate_unique_email_batch,
+                unique_columns["email"],
+                config["email_length"],
+                False,
+                raw=email_raw,
+            )
+        else:
+            email_producer = column_producer(
+                generate_email_batch, config["email_length"], False, raw=email_raw
+            )
+        if config["email_hash"]:
+            email_producer = hashed_producer(email_producer, hasher)
+        producers.append(email_producer)
+
+    if config["psid_title"]:
+        producers.append(
+            column_producer(generate_psid_id_batch, config["psid_length"], raw=raw)
+        )
+
+    if config["tag_layout"] == "wide":
+        producers.append(tag_column_producer(config, seed))
+    return producers
+
+
+def iter_row_batches(config, rng=None, on_edges=None, on_tags=None, raw=False):
+    # In the long layout the members batch has no tag columns; each batch's
+    # (key, tag) pairs go to on_edges(count, columns) instead. With on_tags the
+    # tags skip formatting and arrive as CSR: on_tags(n, offsets, indices).
+    # With raw, generated columns may be uint8 (n, width) character buffers
+    # (see to_strings) rather than lists of str, unless on_edges needs str keys.
+    config = normalize_config(config)
+    # Taken from the layout asked for, so a wide export via on_tags keeps the
+    # same rows as the wide CSV.
+    unique_names = unique_column_names(config)
+    if on_tags is not None:
+        config["tag_layout"] = "long"
+    needs_seed = unique_names or config["tag_option"] == "quota"
+    seed = permutation_seed(rng) if needs_seed else None
+    start = config["start"]
+
+    with ParallelHasher(config["hash_workers"]) as hasher:
+        producers = compile_row_plan(
+            config, seed, hasher, raw and on_edges is None, unique_names
+        )
+        if config["tag_layout"] == "long" and (on_edges is not None or on_tags is not None):
+            assign = tag_assignment_producer(config, seed)
+            key_index = edge_key_column(config)[0]
+            names = np.array(config["tags"], dtype=object)
+        else:
+            assign = None
+
+        def finish(n, columns, tags):
+            # Callbacks run as their batch is yielded, so edges and tags
+            # never get ahead of the member rows.
+            columns = [values() if callable(values) else values for values in columns]
+            if tags is not None:
+                offsets, indices = tags
+                if on_tags is not None:
+                    on_tags(n, offsets, indices)
+                if on_edges is not None:
+                    owners = np.repeat(np.arange(n), np.diff(offsets))
+                    keys = np.array(columns[key_index], dtype=object)[owners].tolist()
+                    on_edges(len(indices), [keys, names[indices].tolist()])
+            return n, columns
+
+        # Hashed columns are still being hashed when their batch is generated;
+        # a few batches are kept back so generation overlaps the hashing.
+        hashed = (config["include_phone_number"] and config["hash_numbers"]) or (
+            config["email_title"] and config["email_hash"]
+        )
+        lookahead = hasher.lookahead(BATCH_SIZE) if hashed else 0
+        pending = deque()
+        for offset in range(0, config["amount"], BATCH_SIZE):
+            n = min(BATCH_SIZE, config["amount"] - offset)
+            row_rng = batch_rng(rng, start + offset)
+            columns = []
+            for produce in producers:
+                columns.extend(produce(n, start + offset, row_rng))
+            tags = assign(n, start + offset, row_rng) if assign is not None else None
+            pending.append((n, columns, tags))
+            if len(pending) > lookahead:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+
+
+def iter_member_rows(config, rng=None):
+    for n, columns in iter_row_batches(config, rng):
+        yield from zip(*columns) if columns else repeat((), n)
+
+
+def get_row(config, seed, index):
+    config = normalize_config(config)
+    return next(iter_member_rows(dict(config, amount=1, start=index), CounterRNG(seed)))
@@ -0,0 +1,61 @@
+import numpy as np
+
+# One Philox4x64 counter step yields 4 uint64, i.e. 8 uint32 words.
+WORDS_PER_BLOCK = 8
+
+
+class CounterRNG:
+    def __init__(self, seed):
+        self.seed = seed
+        self.keys = []
+
+    def key(self, field):
+        while len(self.keys) <= field:
+            sequence = np.random.SeedSequence(self.seed, spawn_key=(len(self.keys),))
+            self.keys.append(sequence.generate_state(2, np.uint64))
+        return self.keys[field]
+
+    def at(self, row):
+        return RowBlockRNG(self, row)
+
+
+class RowBlockRNG:
+    # Every integers() call is one field. The words for row i of field f come
+    # from Philox keyed by (seed, f) at counter i * blocks_per_row, so a row's
+    # values never depend on which batch or shard it was generated in.
+    def __init__(self, counter_rng, row):
+        self.counter_rng = counter_rng
+        self.row = row
+        self.field = 0
+
+    def integers(self, low, high=None, size=None, dtype=np.int64):
+        if high is None:
+            low, high = 0, low
+        # Same contract as numpy's Generator.integers, which the unseeded path uses.
+        if high <= low:
+            raise ValueError("CounterRNG needs high > low")
+        if high - low > 2**32:
+            raise ValueError("CounterRNG only draws ranges up to 2**32 wide")
+        n, width = size if isinstance(size, tuple) else (size, 1)
+
+        key = self.counter_rng.key(self.field)
+        self.field += 1
+
+        blocks = -(-width // WORDS_PER_BLOCK)
+        bit_generator = np.random.Philox(key=key, counter=[self.row * blocks, 0, 0, 0])
+        words = (
+            bit_generator.random_raw(n * blocks * 4)
+            .view(np.uint32)
+            .reshape(n, blocks * WORDS_PER_BLOCK)[:, :width]
+        )
+
+        # Multiply-shift maps a 32-bit word onto [0, span); bias is at most span / 2**32.
+        span = np.uint64(high - low)
+        values = ((words.astype(np.uint64) * span) >> np.uint64(32)).astype(dtype) + low
+        return values if isinstance(size, tuple) else values.reshape(n)
+
+
+def batch_rng(rng, row):
+    if isinstance(rng, CounterRNG):
+        return rng.at(row)
+    return rng
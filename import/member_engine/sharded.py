@@ -0,0 +1,253 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from functools import partial
+
+import numpy as np
+
+from .config import normalize_config
+from .compression import open_config_output
+from .fast_csv import CsvSink, write_csv_batches
+from .pipeline import tag_edge_path
+from .split import SplitCsvWriter, is_split, split_part_path, write_manifest, write_split_batches
+from .rng import CounterRNG
+
+PROGRESS_INTERVAL = 10000
+
+
+class GenerationCancelled(Exception):
+    pass
+
+
+def track_batches(batches, cancel_event=None, on_progress=None):
+    rows_done = 0
+    reported = 0
+    for n, columns in batches:
+        yield n, columns
+        rows_done += n
+        if rows_done - reported >= PROGRESS_INTERVAL:
+            reported = rows_done
+            if on_progress is not None:
+                on_progress(rows_done)
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled()
+
+
+def new_master_seed():
+    return int(np.random.SeedSequence().entropy)
+
+
+def split_amount(amount, shards, unit=1):
+    # Shard sizes are whole multiples of unit, except for the last shard.
+    units, remainder = divmod(amount, unit)
+    base, extra = divmod(units, shards)
+    amounts = [(base + (1 if i < extra else 0)) * unit for i in range(shards)]
+    amounts[-1] += remainder
+    return amounts
+
+
+def write_shard(
+    iter_batches,
+    config,
+    seed,
+    index,
+    header,
+    part_path,
+    encoding,
+    quoted_columns=None,
+    edges=None,
+    cancel_event=None,
+    on_rows=None,
+):
+    cancelled = False
+
+    def counted_batches(batches):
+        nonlocal cancelled
+        for n, columns in batches:
+            yield n, columns
+            if on_rows is not None:
+                on_rows(n)
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                return
+
+    with ExitStack() as stack:
+        on_edges = None
+        if edges is not None:
+            edge_header, edge_quoted_columns, edge_encoding = edges
+            edge_file = stack.enter_context(open_config_output(config, tag_edge_path(part_path)))
+            on_edges = CsvSink(edge_file, edge_header, edge_quoted_columns, edge_encoding).write
+        batches = counted_batches(iter_batches(config, CounterRNG(seed), on_edges))
+        if is_split(config):
+            root = os.path.splitext(part_path)[0]
+            writer = SplitCsvWriter(
+                lambda number: f"{root}_{number:05d}.csv",
+                header,
+                quoted_columns,
+                encoding,
+                config["split_rows"],
+                config["split_bytes"],
+                partial(open_config_output, config),
+            )
+            result = write_split_batches(batches, writer)
+        else:
+            file = stack.enter_context(open_config_output(config, part_path))
+            write_csv_batches(
+                batches, header, file, quoted_columns, encoding, config["background_write"]
+            )
+            result = part_path
+
+    return None if cancelled else result
+
+
+def run_shards_inline(jobs, cancel_event, on_progress):
+    rows_done = 0
+
+    def on_rows(count):
+        nonlocal rows_done
+        rows_done += count
+        if on_progress is not None:
+            on_progress(rows_done)
+
+    part_paths = []
+    for job in jobs:
+        part_path = write_shard(*job, cancel_event, on_rows)
+        if part_path is None:
+            raise GenerationCancelled()
+        part_paths.append(part_path)
+    return part_paths
+
+
+def run_shards_parallel(jobs, workers, cancel_event, on_progress):
+    rows_done = 0
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as executor:
+        shard_cancel = manager.Event()
+        row_counts = manager.Queue()
+        futures = [
+            executor.submit(write_shard, *job, shard_cancel, row_counts.put) for job in jobs
+        ]
+
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            while not row_counts.empty():
+                rows_done += row_counts.get()
+            if on_progress is not None:
+                on_progress(rows_done)
+            if cancel_event is not None and cancel_event.is_set():
+                shard_cancel.set()
+
+        part_paths = [future.result() for future in futures]
+
+    if None in part_paths:
+        raise GenerationCancelled()
+    return part_paths
+
+
+def shard_part_path(part_dir, index):
+    return os.path.join(part_dir, f"part{index:05d}.csv")
+
+
+def iter_shard_jobs(
+    iter_batches, config, header, part_dir, workers, seed, encoding, quoted_columns, edges
+):
+    # Only the first part carries the BOM and header so the parts concatenate
+    # cleanly; split files each stand alone, so every one gets them.
+    split = is_split(config)
+    tail_encoding = 'utf-8' if encoding == 'utf-8-sig' else encoding
+    # Row-limited shards end on a file boundary, giving the same files as one process.
+    unit = config["split_rows"] if config["split_rows"] and not config["split_bytes"] else 1
+    start = 0
+    for index, amount in enumerate(split_amount(config["amount"], workers, unit)):
+        # Shards already run one per core, so they hash and compress in-process.
+        shard_config = dict(
+            config, amount=amount, start=start, hash_workers=1, compression_workers=1
+        )
+        start += amount
+        yield (
+            iter_batches,
+            shard_config,
+            seed,
+            index,
+            header if index == 0 or split else None,
+            shard_part_path(part_dir, index),
+            encoding if index == 0 or split else tail_encoding,
+            quoted_columns,
+            edges and (
+                edges[1] if index == 0 else None,
+                edges[2],
+                encoding if index == 0 else tail_encoding,
+            ),
+        )
+
+
+def concatenate_parts(part_paths, file_path):
+    with open(file_path, 'wb') as output:
+        for part_path in part_paths:
+            with open(part_path, 'rb') as part:
+                shutil.copyfileobj(part, output, 1024 * 1024)
+
+
+def export_sharded_csv(
+    iter_batches,
+    config,
+    header,
+    file_path,
+    workers=1,
+    seed=None,
+    encoding='utf-8-sig',
+    parallel=True,
+    cancel_event=None,
+    on_progress=None,
+    quoted_columns=None,
+    edges=None,
+):
+    # edges is (path, header, quoted_columns) of the long-layout tag file.
+    config = normalize_config(config)
+    if seed is None:
+        seed = new_master_seed()
+
+    part_dir = tempfile.mkdtemp(prefix='member_list_', dir=os.path.dirname(file_path) or None)
+    jobs = list(
+        iter_shard_jobs(
+            iter_batches,
+            config,
+            header,
+            part_dir,
+            workers,
+            seed,
+            encoding,
+            quoted_columns,
+            edges,
+        )
+    )
+
+    try:
+        if parallel and workers > 1:
+            part_paths = run_shards_parallel(jobs, workers, cancel_event, on_progress)
+        else:
+            part_paths = run_shards_inline(jobs, cancel_event, on_progress)
+
+        if is_split(config):
+            files = [part for shard_parts in part_paths for part in shard_parts]
+            for number, part in enumerate(files, 1):
+                final_path = split_part_path(file_path, number)
+                os.replace(part["path"], final_path)
+                part["path"] = final_path
+            write_manifest(
+                file_path, files, header, seed, config["split_rows"], config["split_bytes"]
+            )
+        else:
+            concatenate_parts(part_paths, file_path)
+        if edges is not None:
+            edge_part_paths = [
+                tag_edge_path(shard_part_path(part_dir, index)) for index in range(len(jobs))
+            ]
+            concatenate_parts(edge_part_paths, edges[0])
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    return seed
@@ -0,0 +1,166 @@
+import codecs
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .compression import DigestFile, open_output, split_extension
+from .fast_csv import LINE_TERMINATOR, format_header, format_lines
+
+
+def is_split(config):
+    return config["split_rows"] is not None or config["split_bytes"] is not None
+
+
+def split_part_path(file_path, number):
+    root, extension = split_extension(file_path)
+    return f"{root}_part{number:04d}{extension or '.csv'}"
+
+
+def manifest_path(file_path):
+    return f"{split_extension(file_path)[0]}_manifest.json"
+
+
+class SplitCsvWriter:
+    # Streams batches into files of at most max_rows rows / max_bytes bytes,
+    # each with its own BOM and header, hashing every file as it is written.
+    # max_bytes limits the CSV bytes, since compressed sizes are only known
+    # afterwards; bytes and sha256 describe the file on disk, csv_bytes and
+    # csv_sha256 the CSV inside it.
+    def __init__(
+        self,
+        path_for,
+        header=None,
+        quoted_columns=None,
+        encoding='utf-8-sig',
+        max_rows=None,
+        max_bytes=None,
+        open_file=open_output,
+    ):
+        self.path_for = path_for
+        self.open_file = open_file
+        self.header = format_header(header) if header else None
+        self.quoted_columns = quoted_columns
+        self.encoding = encoding
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.parts = []
+        self.file = None
+
+    def open_part(self):
+        path = self.path_for(len(self.parts))
+        self.file = self.open_file(path, wrap=self.wrap_disk_file)
+        # Uncompressed, the CSV is the file on disk and is hashed only once.
+        self.csv_sha256 = hashlib.sha256() if self.file is not self.disk_file else None
+        self.encode = codecs.getincrementalencoder(self.encoding)().encode
+        self.part = {"path": path, "rows": 0, "csv_bytes": 0}
+        self.parts.append(self.part)
+        if self.header:
+            self.write_bytes(self.encode(self.header))
+
+    def wrap_disk_file(self, file):
+        self.disk_file = DigestFile(file)
+        return self.disk_file
+
+    def close_part(self):
+        self.file.close()
+        self.file = None
+        self.part["bytes"] = self.disk_file.size
+        self.part["sha256"] = self.disk_file.sha256.hexdigest()
+        csv_sha256 = self.csv_sha256 or self.disk_file.sha256
+        self.part["csv_sha256"] = csv_sha256.hexdigest()
+
+    def write_bytes(self, data):
+        self.file.write(data)
+        if self.csv_sha256 is not None:
+            self.csv_sha256.update(data)
+        self.part["csv_bytes"] += len(data)
+
+    def line_sizes(self, lines, text):
+        if text.isascii():
+            return np.fromiter(map(len, lines), dtype=np.int64, count=len(lines)) + 2
+        encoding = 'utf-8' if self.encoding == 'utf-8-sig' else self.encoding
+        return np.array(
+            [len(line.encode(encoding)) + 2 for line in lines], dtype=np.int64
+        )
+
+    def rows_that_fit(self, sizes, start, total):
+        count = total - start
+        if self.max_rows is not None:
+            count = min(count, self.max_rows - self.part["rows"])
+        if sizes is not None:
+            room = self.max_bytes - self.part["csv_bytes"]
+            ends = np.cumsum(sizes[start:start + count])
+            count = int(np.searchsorted(ends, room, side='right'))
+        # A row larger than the whole limit still has to go somewhere.
+        return count if count or self.part["rows"] else 1
+
+    def write(self, n, columns):
+        if not n:
+            return
+        lines = format_lines(columns, self.quoted_columns)
+        sizes = self.line_sizes(lines, ''.join(lines)) if self.max_bytes is not None else None
+
+        start = 0
+        while start < len(lines):
+            if self.file is None:
+                self.open_part()
+            count = self.rows_that_fit(sizes, start, len(lines))
+            if count == 0:
+                self.close_part()
+                continue
+            chunk = LINE_TERMINATOR.join(lines[start:start + count]) + LINE_TERMINATOR
+            self.write_bytes(self.encode(chunk))
+            self.part["rows"] += count
+            start += count
+
+    def close(self):
+        if self.file is not None:
+            self.close_part()
+        return self.parts
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        for part in self.parts:
+            if os.path.exists(part["path"]):
+                os.remove(part["path"])
+
+
+def write_split_batches(batches, writer):
+    try:
+        for n, columns in batches:
+            writer.write(n, columns)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
+
+
+def write_manifest(file_path, parts, header, seed, max_rows, max_bytes):
+    manifest = {
+        "seed": seed,
+        "header": header,
+        "max_rows": max_rows,
+        "max_bytes": max_bytes,
+        "rows": sum(part["rows"] for part in parts),
+        "bytes": sum(part["bytes"] for part in parts),
+        "csv_bytes": sum(part["csv_bytes"] for part in parts),
+        "files": [
+            {
+                "path": os.path.basename(part["path"]),
+                "rows": part["rows"],
+                "bytes": part["bytes"],
+                "sha256": part["sha256"],
+                "csv_bytes": part["csv_bytes"],
+                "csv_sha256": part["csv_sha256"],
+            }
+            for part in parts
+        ],
+    }
+    path = manifest_path(file_path)
+    with open(path, mode='w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return path
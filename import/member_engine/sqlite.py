@@ -0,0 +1,108 @@
+import sqlite3
+
+from .pipeline import build_edge_header, build_header, edge_key_column, iter_row_batches
+from .rng import CounterRNG
+from .sharded import track_batches
+from .split import is_split
+
+# Rows per transaction; at this size commits are a rounding error.
+COMMIT_ROWS = 1_000_000
+# Load-time settings: no fsyncs and a 256 MiB page cache (negative = KiB).
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-262144",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def create_table(connection, table, columns):
+    # Replaces only this table, so other tables in a test database survive.
+    connection.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+    definitions = ', '.join(f"{quote_identifier(column)} TEXT" for column in columns)
+    connection.execute(f"CREATE TABLE {quote_identifier(table)} ({definitions})")
+    return f"INSERT INTO {quote_identifier(table)} VALUES ({', '.join('?' * len(columns))})"
+
+
+def create_index(connection, table, column):
+    connection.execute(
+        f"CREATE INDEX {quote_identifier(f'{table}_{column}')} "
+        f"ON {quote_identifier(table)} ({quote_identifier(column)})"
+    )
+
+
+def sqlite_indexes(config, header):
+    if config["sqlite_indexes"] is not None:
+        missing = [column for column in config["sqlite_indexes"] if column not in header]
+        if missing:
+            raise ValueError(f"找不到要建立索引的欄位: {', '.join(missing)}")
+        return list(config["sqlite_indexes"])
+    if config["include_member_id"] or config["line_uid_title"]:
+        return [edge_key_column(config)[1]]
+    return []
+
+
+def export_sqlite(config, file_path, seed=None, cancel_event=None, on_progress=None):
+    if is_split(config) or config["compression"] is not None:
+        raise ValueError("SQLite 輸出不支援分割或壓縮檔案")
+
+    table = config["sqlite_table"]
+    header = build_header(config)
+    indexes = sqlite_indexes(config, header)
+    rng = CounterRNG(seed) if seed is not None else None
+
+    connection = sqlite3.connect(file_path, isolation_level=None)
+    created = []
+    committed = False
+    try:
+        for pragma in LOAD_PRAGMAS:
+            connection.execute(pragma)
+        connection.execute("BEGIN")
+        insert = create_table(connection, table, header)
+        created.append(table)
+        on_edges = None
+        if config["tag_layout"] == "long":
+            edge_table = f"{table}_tags"
+            edge_insert = create_table(connection, edge_table, build_edge_header(config))
+            created.append(edge_table)
+
+            def on_edges(count, columns):
+                connection.executemany(edge_insert, zip(*columns))
+
+        # Indexes are built once after the load instead of updated per row.
+        uncommitted = 0
+        batches = iter_row_batches(config, rng, on_edges)
+        for n, columns in track_batches(batches, cancel_event, on_progress):
+            connection.executemany(insert, zip(*columns))
+            uncommitted += n
+            if uncommitted >= COMMIT_ROWS:
+                connection.execute("COMMIT")
+                connection.execute("BEGIN")
+                committed = True
+                uncommitted = 0
+        for column in indexes:
+            create_index(connection, table, column)
+        if on_edges is not None:
+            for column in build_edge_header(config):
+                create_index(connection, edge_table, column)
+        connection.execute("COMMIT")
+
+        # Back to a single self-contained file once the load is done.
+        connection.execute("PRAGMA journal_mode=DELETE")
+    except BaseException:
+        # Before the first commit a rollback restores the database as it was;
+        # after it, drop the partial tables rather than the file, which may
+        # hold other tables.
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        if committed:
+            for name in created:
+                connection.execute(f"DROP TABLE IF EXISTS {quote_identifier(name)}")
+        raise
+    finally:
+        connection.close()
+    return file_path
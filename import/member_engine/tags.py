@@ -0,0 +1,244 @@
+from itertools import chain
+
+import numpy as np
+
+from .alias import THRESHOLD_SCALE, AliasTable, zipf_weights
+from .config import normalize_config
+from .generators import _get_rng, choose_tag_indices, sample_tag_csr, split_csr
+from .rng import batch_rng
+from .unique import FeistelPermutation, row_indices
+
+BATCH_SIZE = 10000
+# Alias draws per requested tag in each round; rows that still lack distinct
+# tags draw another round, and after WEIGHTED_ROUNDS the few rows left are
+# finished by exact sampling over the remaining weights.
+WEIGHTED_CANDIDATES = 4
+WEIGHTED_ROUNDS = 8
+# Permutation streams for quota tags, clear of the unique ID column streams.
+QUOTA_STREAM = 1 << 16
+
+
+def tag_alias_table(tags, weights=None, zipf_exponent=None):
+    if weights is None and zipf_exponent is not None:
+        weights = zipf_weights(len(tags), zipf_exponent)
+    return AliasTable(weights) if weights is not None else None
+
+
+def sample_weighted_tag_indices(n, table, min_tags, max_tags, rng=None):
+    # Each row keeps the first distinct tags of its own stream of alias draws,
+    # which is successive weighted sampling without replacement. Every round
+    # draws for the whole batch so a row's stream stays row-addressable.
+    rng = _get_rng(rng)
+    max_tags = min(max_tags, table.positive)
+    counts = rng.integers(min_tags, max_tags + 1, size=n).tolist()
+    rows = [[] for _ in range(n)]
+    short = range(n)
+    for _ in range(WEIGHTED_ROUNDS):
+        candidates = table.draw((n, max_tags * WEIGHTED_CANDIDATES), rng).tolist()
+        for i in short:
+            rows[i] = list(dict.fromkeys(rows[i] + candidates[i]))[: counts[i]]
+        short = [i for i in short if len(rows[i]) < counts[i]]
+        if not short:
+            return rows
+
+    uniforms = rng.integers(0, THRESHOLD_SCALE, size=(n, max_tags), dtype=np.uint64)
+    for i in short:
+        remaining = table.weights.copy()
+        remaining[rows[i]] = 0
+        for word in uniforms[i, : counts[i] - len(rows[i])].tolist():
+            cumulative = np.cumsum(remaining)
+            j = int(np.searchsorted(cumulative, word / THRESHOLD_SCALE * cumulative[-1], 'right'))
+            j = min(j, table.count - 1)
+            rows[i].append(j)
+            remaining[j] = 0
+    return rows
+
+
+def lists_to_csr(rows):
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=offsets[1:])
+    return offsets, np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=offsets[-1])
+
+
+def single_tag_csr(indices):
+    indices = np.asarray(indices, dtype=np.int64)
+    return np.arange(len(indices) + 1, dtype=np.int64), indices
+
+
+def join_tag_csr(names, offsets, indices):
+    return list(map(', '.join, split_csr(offsets, names[indices].tolist())))
+
+
+def quota_counts(quotas, percentages, total):
+    if (quotas is None) == (percentages is None):
+        raise ValueError("quota 模式需要指定 tag_quotas 或 tag_percentages 其中之一")
+
+    if quotas is not None:
+        counts = [int(quota) for quota in quotas]
+    else:
+        # Largest remainder, so percentages adding up to 100 cover every member.
+        exact = [total * percentage / 100 for percentage in percentages]
+        counts = [int(value) for value in exact]
+        target = min(total, round(sum(exact)))
+        by_remainder = sorted(range(len(exact)), key=lambda j: counts[j] - exact[j])
+        for j in by_remainder[: max(0, target - sum(counts))]:
+            counts[j] += 1
+
+    if min(counts, default=0) < 0:
+        raise ValueError("標籤配額不可為負數")
+    return counts
+
+
+def quota_assignment_producer(tag_count, counts, total, seed, multiple):
+    # Row i's tags depend only on (seed, i), so quotas hold exactly across
+    # batches and shards with O(#tags) state. Tags take consecutive runs of
+    # slots on a circle of total slots, going round as many laps as the
+    # quotas need, and one permutation puts each member on a slot. A run is
+    # at most one lap, so tag j covers exactly counts[j] distinct members,
+    # and a member gets one tag per lap: the cost per member is the number
+    # of laps, not the number of tags.
+    if not multiple and sum(counts) > total:
+        raise ValueError(f"標籤配額總和 {sum(counts):,} 超過成員數量 {total:,}")
+    if max(counts, default=0) > total:
+        raise ValueError(f"單一標籤配額不可超過成員數量 {total:,}")
+    bounds = np.cumsum(counts).astype(np.uint64)
+    laps = -(-sum(counts) // max(total, 1))
+    lap_starts = np.arange(laps, dtype=np.uint64) * np.uint64(total)
+    permutation = FeistelPermutation(max(total, 1), seed, QUOTA_STREAM)
+
+    def produce(n, start, rng):
+        slots = permutation.permute(row_indices(start, n))
+        # Past the last run (index tag_count) means no tag in that lap.
+        indices = np.searchsorted(bounds, slots[:, None] + lap_starts, side='right')
+        if laps > 1:
+            indices.sort(axis=1)
+        tagged = indices < tag_count
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(tagged.sum(axis=1), out=offsets[1:])
+        return offsets, indices[tagged]
+
+    return produce
+
+
+def iter_tags(
+    tags,
+    tag_option,
+    amount,
+    random_tag_count=False,
+    min_tags=1,
+    max_tags=3,
+    rng=None,
+    start=0,
+    weights=None,
+    zipf_exponent=None,
+):
+    # Each member's tag names, drawn by the same producers as the exports.
+    config = normalize_config(
+        {
+            "tags": tags,
+            "tag_option": tag_option,
+            "amount": amount,
+            "start": start,
+            "random_tag_count": random_tag_count,
+            "min_tags": min_tags,
+            "max_tags": max_tags,
+            "tag_weights": weights,
+            "tag_zipf_exponent": zipf_exponent,
+        }
+    )
+    assign = tag_assignment_producer(config)
+    for offset in range(0, amount, BATCH_SIZE):
+        n = min(BATCH_SIZE, amount - offset)
+        offsets, indices = assign(n, start + offset, batch_rng(rng, start + offset))
+        yield from split_csr(offsets, [tags[j] for j in indices.tolist()])
+
+
+def generate_tags(
+    tags,
+    tag_option,
+    amount,
+    random_tag_count=False,
+    min_tags=1,
+    max_tags=3,
+    weights=None,
+    zipf_exponent=None,
+):
+    return list(
+        iter_tags(
+            tags,
+            tag_option,
+            amount,
+            random_tag_count,
+            min_tags,
+            max_tags,
+            weights=weights,
+            zipf_exponent=zipf_exponent,
+        )
+    )
+
+
+def tag_assignment_producer(config, seed=None):
+    # Each member's tags as CSR (offsets, indices), for layouts that write one
+    # row per assignment. Draws match tag_column_producer for the same seed.
+    tags = config["tags"]
+    tag_option = config["tag_option"]
+    tag_count = len(tags)
+
+    if tag_option in ("all_in_one", "separate_columns"):
+        every_tag = np.arange(tag_count, dtype=np.int64)
+        return lambda n, start, rng: (
+            np.arange(n + 1, dtype=np.int64) * tag_count,
+            np.tile(every_tag, n),
+        )
+
+    if tag_option == "even":
+        return lambda n, start, rng: single_tag_csr(np.arange(start, start + n) % tag_count)
+
+    if tag_option == "quota":
+        counts = quota_counts(
+            config["tag_quotas"], config["tag_percentages"], config["total_amount"]
+        )
+        return quota_assignment_producer(
+            tag_count, counts, config["total_amount"], seed, config["random_tag_count"]
+        )
+
+    alias_table = tag_alias_table(tags, config["tag_weights"], config["tag_zipf_exponent"])
+    if config["random_tag_count"]:
+        max_tags = min(config["max_tags"], tag_count)
+        if alias_table is not None:
+            return lambda n, start, rng: lists_to_csr(
+                sample_weighted_tag_indices(n, alias_table, config["min_tags"], max_tags, rng)
+            )
+        return lambda n, start, rng: sample_tag_csr(
+            n, tag_count, config["min_tags"], max_tags, rng
+        )
+
+    if alias_table is not None:
+        return lambda n, start, rng: single_tag_csr(alias_table.draw(n, rng))
+    return lambda n, start, rng: single_tag_csr(choose_tag_indices(n, tag_count, rng))
+
+
+def tag_column_producer(config, seed=None):
+    tags = config["tags"]
+    tag_option = config["tag_option"]
+
+    if tag_option == "all_in_one":
+        value = ', '.join(tags)
+        return lambda n, start, rng: [[value] * n]
+
+    if tag_option == "separate_columns":
+        return lambda n, start, rng: [[tag] * n for tag in tags]
+
+    if tag_option == "even":
+        return lambda n, start, rng: [[tags[i % len(tags)] for i in range(start, start + n)]]
+
+    if tag_option == "random" and not config["random_tag_count"]:
+        # One tag per member: index straight into the names, no joins.
+        alias_table = tag_alias_table(tags, config["tag_weights"], config["tag_zipf_exponent"])
+        if alias_table is not None:
+            return lambda n, start, rng: [[tags[j] for j in alias_table.draw(n, rng).tolist()]]
+        return lambda n, start, rng: [[tags[j] for j in choose_tag_indices(n, len(tags), rng)]]
+
+    assign = tag_assignment_producer(config, seed)
+    names = np.array(tags, dtype=object)
+    return lambda n, start, rng: [join_tag_csr(names, *assign(n, start, rng))]
@@ -0,0 +1,144 @@
+import numpy as np
+
+from .generators import (
+    DIGITS,
+    HEX_DIGITS,
+    LOWERCASE,
+    LOWERCASE_DIGITS,
+    UPPERCASE,
+    hash_values,
+    literal_chars,
+    random_chars,
+    to_strings,
+)
+from .rng import CounterRNG
+
+# Keeps permutation keys apart from the CounterRNG field keys of the same seed.
+UNIQUE_STREAM = 1 << 32
+# Largest ID space a single permutation covers; the Feistel halves must fit in uint64.
+MAX_DOMAIN = 1 << 62
+
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def permutation_seed(rng):
+    if isinstance(rng, CounterRNG):
+        return rng.seed
+    return int(np.random.SeedSequence().entropy)
+
+
+def _mix(values, key):
+    values = values ^ key
+    values = (values ^ (values >> np.uint64(30))) * MIX_1
+    values = (values ^ (values >> np.uint64(27))) * MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+class FeistelPermutation:
+    # Keyed bijection on [0, domain): a balanced Feistel network over the
+    # smallest even-width power of two >= domain, with cycle walking to map
+    # results that land outside the domain back into it.
+    def __init__(self, domain, seed, stream, rounds=6):
+        self.domain = np.uint64(domain)
+        bits = max(2, (domain - 1).bit_length())
+        self.half_bits = np.uint64((bits + 1) // 2)
+        self.half_mask = np.uint64((1 << int(self.half_bits)) - 1)
+        sequence = np.random.SeedSequence(seed, spawn_key=(UNIQUE_STREAM, stream))
+        self.keys = sequence.generate_state(rounds, np.uint64)
+
+    def _encrypt(self, values):
+        left = values >> self.half_bits
+        right = values & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ (_mix(right, key) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def permute(self, values):
+        values = self._encrypt(np.asarray(values, dtype=np.uint64))
+        outside = values >= self.domain
+        while outside.any():
+            values[outside] = self._encrypt(values[outside])
+            outside = values >= self.domain
+        return values
+
+
+class UniqueColumn:
+    # Fixed-width code over per-position alphabets. The rightmost positions
+    # whose combined space fits MAX_DOMAIN encode permute(row_index), which
+    # makes the column unique; any positions left of that stay random.
+    def __init__(self, alphabets, seed, stream):
+        self.alphabets = alphabets
+        self.head_width = len(alphabets)
+        domain = 1
+        while self.head_width > 0 and domain * len(alphabets[self.head_width - 1]) <= MAX_DOMAIN:
+            self.head_width -= 1
+            domain *= len(alphabets[self.head_width])
+        self.capacity = domain
+        self.permutation = FeistelPermutation(domain, seed, stream)
+
+    def check_capacity(self, amount, name):
+        if amount > self.capacity:
+            raise ValueError(f"{name} 最多只能產生 {self.capacity} 筆不重複的值")
+
+    def batch(self, rows, rng=None):
+        n = len(rows)
+        buffer = np.empty((n, len(self.alphabets)), dtype=np.uint8)
+
+        position = 0
+        while position < self.head_width:
+            alphabet = self.alphabets[position]
+            end = position
+            while end < self.head_width and self.alphabets[end] is alphabet:
+                end += 1
+            buffer[:, position:end] = random_chars(alphabet, n, end - position, rng)
+            position = end
+
+        values = self.permutation.permute(rows)
+        for position in range(len(self.alphabets) - 1, self.head_width - 1, -1):
+            alphabet = self.alphabets[position]
+            radix = np.uint64(len(alphabet))
+            buffer[:, position] = alphabet[values % radix]
+            values //= radix
+
+        return buffer
+
+
+def row_indices(start, n):
+    return np.arange(start, start + n, dtype=np.uint64)
+
+
+def unique_line_uid_column(seed):
+    return UniqueColumn([HEX_DIGITS] * 32, seed, 0)
+
+
+def unique_member_id_column(include_letters, letter_count, id_length, seed):
+    if include_letters:
+        alphabets = [UPPERCASE] * letter_count + [DIGITS] * (id_length - letter_count)
+    else:
+        alphabets = [DIGITS] * id_length
+    return UniqueColumn(alphabets, seed, 1)
+
+
+def unique_email_column(length, seed):
+    return UniqueColumn([LOWERCASE_DIGITS] * length + [LOWERCASE] * 5, seed, 2)
+
+
+def generate_unique_line_uid_batch(column, rows, rng=None, raw=False):
+    return to_strings(np.hstack([literal_chars('U', len(rows)), column.batch(rows, rng)]), raw)
+
+
+def generate_unique_member_id_batch(column, rows, rng=None, raw=False):
+    return to_strings(column.batch(rows, rng), raw)
+
+
+def generate_unique_email_batch(column, rows, length, hash_email, rng=None, raw=False):
+    n = len(rows)
+    codes = column.batch(rows, rng)
+    buffer = np.hstack(
+        [codes[:, :length], literal_chars('@', n), codes[:, length:], literal_chars('.com', n)]
+    )
+
+    if hash_email:
+        return hash_values(to_strings(buffer))
+    return to_strings(buffer, raw)
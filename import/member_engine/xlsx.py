@@ -0,0 +1,233 @@
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from .pipeline import (
+    EDGE_QUOTED_COLUMNS,
+    build_edge_header,
+    build_header,
+    build_quoted_columns,
+    iter_row_batches,
+    tag_edge_path,
+)
+from .rng import CounterRNG
+from .sharded import track_batches
+from .split import is_split
+
+# Excel's hard limit per worksheet, header row included.
+XLSX_MAX_ROWS = 1_048_576
+# Deflate dominates the export time; level 1 is a third faster than the
+# default 6 for about 15% larger files.
+DEFLATE_LEVEL = 1
+# Control characters XML 1.0 cannot carry at all.
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+MAIN_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELATIONSHIP_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+TYPES_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/content-types'
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+RELATIONSHIPS_TYPE = 'application/vnd.openxmlformats-package.relationships+xml'
+
+ROOT_RELS = (
+    f'{XML_DECLARATION}<Relationships xmlns="{PACKAGE_NAMESPACE}">'
+    f'<Relationship Id="rId1" Type="{RELATIONSHIP_NAMESPACE}/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+STYLES = (
+    f'{XML_DECLARATION}<styleSheet xmlns="{MAIN_NAMESPACE}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    '</cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+SHEET_START = f'{XML_DECLARATION}<worksheet xmlns="{MAIN_NAMESPACE}"><sheetData>'
+SHEET_END = '</sheetData></worksheet>'
+
+
+def column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def escape_cell(value):
+    return escape(INVALID_XML_CHARS.sub('', value))
+
+
+def escape_column(values):
+    # Like quote_column: user text repeats a few distinct values per batch.
+    escaped = {value: escape_cell(value) for value in set(values)}
+    return [escaped[value] for value in values]
+
+
+def row_template(count):
+    # Every cell is an inline string: IDs keep leading zeros, phone numbers
+    # stay text, and no shared string table has to be held in memory.
+    cells = ''.join(
+        f'<c r="{column_letter(j)}{{0}}" t="inlineStr">'
+        f'<is><t xml:space="preserve">{{{j + 1}}}</t></is></c>'
+        for j in range(count)
+    )
+    return f'<row r="{{0}}">{cells}</row>'
+
+
+def content_types(sheet_count):
+    sheets = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+        f'ContentType="{CONTENT_TYPE}.worksheet+xml"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    return (
+        f'{XML_DECLARATION}<Types xmlns="{TYPES_NAMESPACE}">'
+        f'<Default Extension="rels" ContentType="{RELATIONSHIPS_TYPE}"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/xl/workbook.xml" ContentType="{CONTENT_TYPE}.sheet.main+xml"/>'
+        f'<Override PartName="/xl/styles.xml" ContentType="{CONTENT_TYPE}.styles+xml"/>'
+        f'{sheets}</Types>'
+    )
+
+
+def workbook(sheet_count):
+    sheets = ''.join(
+        f'<sheet name="Sheet{number}" sheetId="{number}" r:id="rId{number}"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    return (
+        f'{XML_DECLARATION}<workbook xmlns="{MAIN_NAMESPACE}" xmlns:r="{RELATIONSHIP_NAMESPACE}">'
+        f'<sheets>{sheets}</sheets></workbook>'
+    )
+
+
+def workbook_rels(sheet_count):
+    sheets = ''.join(
+        f'<Relationship Id="rId{number}" Type="{RELATIONSHIP_NAMESPACE}/worksheet" '
+        f'Target="worksheets/sheet{number}.xml"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    return (
+        f'{XML_DECLARATION}<Relationships xmlns="{PACKAGE_NAMESPACE}">{sheets}'
+        f'<Relationship Id="rId{sheet_count + 1}" Type="{RELATIONSHIP_NAMESPACE}/styles" '
+        'Target="styles.xml"/></Relationships>'
+    )
+
+
+class XlsxWriter:
+    # Write-only workbook: sheet XML is streamed into the zip one batch at a
+    # time, starting a new sheet (with the header again) every XLSX_MAX_ROWS
+    # rows. The package parts that list the sheets are written on close.
+    def __init__(
+        self,
+        file_path,
+        header=None,
+        escaped_columns=None,
+        max_rows=XLSX_MAX_ROWS,
+        level=DEFLATE_LEVEL,
+    ):
+        self.archive = zipfile.ZipFile(
+            file_path, mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=level
+        )
+        self.header = [escape_cell(title) for title in header] if header else None
+        self.escaped_columns = escaped_columns
+        self.max_rows = max_rows
+        self.template = None
+        self.sheet_count = 0
+        self.sheet = None
+
+    def open_sheet(self):
+        self.sheet_count += 1
+        self.sheet = self.archive.open(
+            f'xl/worksheets/sheet{self.sheet_count}.xml', mode='w', force_zip64=True
+        )
+        self.sheet.write(SHEET_START.encode('utf-8'))
+        self.row = 0
+        if self.header:
+            self.write_rows([self.header])
+
+    def close_sheet(self):
+        self.sheet.write(SHEET_END.encode('utf-8'))
+        self.sheet.close()
+        self.sheet = None
+
+    def write_rows(self, rows):
+        if self.template is None:
+            self.template = row_template(len(rows[0])).format
+        first = self.row + 1
+        text = ''.join(self.template(number, *row) for number, row in enumerate(rows, first))
+        self.sheet.write(text.encode('utf-8'))
+        self.row += len(rows)
+
+    def write(self, n, columns):
+        if not n:
+            return
+        columns = [
+            escape_column(values)
+            if self.escaped_columns is None or i in self.escaped_columns
+            else values
+            for i, values in enumerate(columns)
+        ]
+        rows = list(zip(*columns))
+        start = 0
+        while start < n:
+            if self.sheet is None or self.row == self.max_rows:
+                if self.sheet is not None:
+                    self.close_sheet()
+                self.open_sheet()
+            count = min(n - start, self.max_rows - self.row)
+            self.write_rows(rows[start:start + count])
+            start += count
+
+    def close(self):
+        if self.sheet is None:
+            self.open_sheet()
+        self.close_sheet()
+        self.archive.writestr('[Content_Types].xml', content_types(self.sheet_count))
+        self.archive.writestr('_rels/.rels', ROOT_RELS)
+        self.archive.writestr('xl/workbook.xml', workbook(self.sheet_count))
+        self.archive.writestr('xl/_rels/workbook.xml.rels', workbook_rels(self.sheet_count))
+        self.archive.writestr('xl/styles.xml', STYLES)
+        self.archive.close()
+
+    def discard(self):
+        if self.sheet is not None:
+            self.sheet.close()
+        self.archive.close()
+
+
+def export_xlsx(config, file_path, seed=None, cancel_event=None, on_progress=None):
+    if is_split(config) or config["compression"] is not None:
+        raise ValueError("XLSX 輸出不支援分割或壓縮檔案")
+
+    header = build_header(config) if config["include_title"] else None
+    level = config["compression_level"] or DEFLATE_LEVEL
+    # Generated values are plain ASCII; only user text needs XML escaping.
+    escaped_columns = build_quoted_columns(config, escape_cell)
+    writers = [XlsxWriter(file_path, header, escaped_columns, level=level)]
+    try:
+        on_edges = None
+        if config["tag_layout"] == "long":
+            edge_header = build_edge_header(config) if config["include_title"] else None
+            writers.append(
+                XlsxWriter(tag_edge_path(file_path), edge_header, EDGE_QUOTED_COLUMNS, level=level)
+            )
+            on_edges = writers[1].write
+
+        rng = CounterRNG(seed) if seed is not None else None
+        batches = iter_row_batches(config, rng, on_edges)
+        for n, columns in track_batches(batches, cancel_event, on_progress):
+            writers[0].write(n, columns)
+    except BaseException:
+        for writer in writers:
+            writer.discard()
+        raise
+    for writer in writers:
+        writer.close()
+    return file_path
@@ -32,6 +32,19 @@ class StyleSheet:
     QPushButton:hover {
         background-color: #3182ce;
     }
+    QPushButton:disabled {
+        background-color: #a0aec0;
+    }
+    QProgressBar {
+        border: 1px solid #cbd5e0;
+        border-radius: 4px;
+        background-color: white;
+        height: 12px;
+    }
+    QProgressBar::chunk {
+        background-color: #48bb78;
+        border-radius: 3px;
+    }
     QCheckBox, QRadioButton {
         font-size: 14px;
         spacing: 5px;
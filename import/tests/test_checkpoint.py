@@ -0,0 +1,80 @@
+import os
+import threading
+
+import pytest
+
+from member_engine import (
+    GenerationCancelled,
+    export_member_list,
+    member_output_path,
+    resume_member_list,
+    tag_edge_path,
+)
+from member_engine.checkpoint import checkpoint_path
+
+CONFIG = {
+    "amount": 60000,
+    "include_member_id": True,
+    "line_uid_title": "LINE User ID",
+    "tags": ["a", "b", "c"],
+    "tag_option": "random",
+    "random_tag_count": True,
+    "min_tags": 1,
+    "max_tags": 2,
+}
+
+
+def crash_after(config, file_path, rows, seed=None):
+    # Stands in for a killed process: the export stops after about rows rows
+    # and leaves its output, and any checkpoint, behind.
+    cancel_event = threading.Event()
+
+    def on_progress(rows_done):
+        if rows_done >= rows:
+            cancel_event.set()
+
+    with pytest.raises(GenerationCancelled):
+        export_member_list(
+            config, file_path, seed=seed, cancel_event=cancel_event, on_progress=on_progress
+        )
+
+
+@pytest.mark.parametrize("extra", [{}, {"compression": "gzip"}, {"tag_layout": "long"}])
+def test_resume_after_crash_is_byte_identical(tmp_path, extra):
+    # Checkpoints end compressed blocks early, so the reference run takes them too.
+    config = dict(CONFIG, checkpoint_rows=10000, **extra)
+    full_path, _ = export_member_list(config, str(tmp_path / "full.csv"), seed=7)
+
+    file_path = member_output_path(config, str(tmp_path / "part.csv"))
+    crash_after(config, file_path, 35000, seed=7)
+    resumed_path, seed = resume_member_list(file_path)
+
+    assert seed == 7
+    outputs = [(full_path, resumed_path)]
+    if config.get("tag_layout") == "long":
+        outputs.append((tag_edge_path(full_path), tag_edge_path(resumed_path)))
+    for expected_path, actual_path in outputs:
+        with open(expected_path, 'rb') as expected, open(actual_path, 'rb') as actual:
+            assert actual.read() == expected.read()
+    assert not os.path.exists(checkpoint_path(file_path))
+
+
+def test_fresh_run_drops_stale_checkpoint(tmp_path):
+    file_path = str(tmp_path / "members.csv")
+    crash_after(dict(CONFIG, checkpoint_rows=10000), file_path, 50000, seed=1)
+    assert (tmp_path / checkpoint_path("members.csv")).exists()
+
+    crash_after(dict(CONFIG, email_title="Email"), file_path, 30000)
+    with pytest.raises(ValueError):
+        resume_member_list(file_path)
+
+
+def test_resume_rejects_overwritten_output(tmp_path):
+    file_path = str(tmp_path / "members.csv")
+    crash_after(dict(CONFIG, checkpoint_rows=10000), file_path, 50000, seed=1)
+
+    with open(file_path, 'r+b') as file:
+        file.seek(100)
+        file.write(b'X')
+    with pytest.raises(ValueError):
+        resume_member_list(file_path)